@@ -10,6 +10,28 @@ import os
 class Settings(BaseSettings):
     """Application settings"""
     
+    # Execution lanes (bulkheads): worker threads and extra queued requests per lane
+    UPLOAD_LANE_WORKERS: int = 4
+    UPLOAD_LANE_QUEUE: int = 32
+    ANALYSIS_LANE_WORKERS: int = 4
+    ANALYSIS_LANE_QUEUE: int = 64
+    EXPORT_LANE_WORKERS: int = 1
+    EXPORT_LANE_QUEUE: int = 4
+    
+    # Request deadlines (overridable per request with X-Request-Timeout-Ms)
+    UPLOAD_DEADLINE_SECONDS: float = 30.0
+    ANALYZE_DEADLINE_SECONDS: float = 15.0
+    REQUEST_DEADLINE_MAX_SECONDS: float = 120.0
+    DISCONNECT_POLL_SECONDS: float = 0.25
+    
+    # Profiler settings
+    PROFILER_INTERVAL_MS: float = 20.0
+    PROFILER_MAX_SECONDS: int = 60
+    
+    # Startup settings
+    LAZY_STARTUP: bool = False  # Defer Pillow and analyzer loading until first use
+    STARTUP_WARM_UP: bool = True  # With LAZY_STARTUP, load them in a background thread
+    
     # File upload settings
     UPLOAD_DIR: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
     MAX_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB
@@ -19,10 +41,57 @@ class Settings(BaseSettings):
     API_KEY_HEADER: str = "X-API-Key"
     ENABLE_API_KEY: bool = True
     API_KEY: Optional[str] = os.getenv("API_KEY", "test-api-key-12345")
+    ADMIN_API_KEY: Optional[str] = None  # Admin endpoints are disabled when unset
+    
+    # Multi-key registry (JSON file or SQLite database of hashed keys); replaces API_KEY when set
+    API_KEY_REGISTRY_PATH: Optional[str] = None
+    API_KEY_PEPPER: Optional[str] = None
+    API_KEY_REGISTRY_RELOAD_SECONDS: float = 5.0
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_QUOTA_PATH: Optional[str] = None  # Quota counters shared by workers; defaults to /dev/shm
+    API_KEY_QUOTA_SLOTS: int = 16384
+    
+    # Result store (SQLite database of uploads and analysis results) and bulk export
+    RESULT_STORE_ENABLED: bool = True
+    RESULT_STORE_PATH: Optional[str] = None  # Defaults to <UPLOAD_DIR>/results.db
+    EXPORT_BATCH_SIZE: int = 5000
+    
+    # Aggregate statistics (GET /api/stats)
+    AGGREGATES_ENABLED: bool = True
+    AGGREGATES_PATH: Optional[str] = None  # Defaults to <UPLOAD_DIR>/aggregates.json
+    AGGREGATES_PERSIST_SECONDS: float = 30.0
+    AGGREGATES_HOURLY_RETENTION: int = 168  # 7 days of hourly buckets
+    AGGREGATES_DAILY_RETENTION: int = 365
     
     # Analysis settings
     CONFIDENCE_THRESHOLD: float = 0.6
     
+    # Progress streaming settings
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_MAX_SUBSCRIPTIONS: int = 100  # image IDs per connection
+    EVENTS_RETAIN_SECONDS: float = 300.0  # Last event per image, sent to late subscribers
+    EVENTS_RETAIN_MAX: int = 10000
+    
+    # Shared-memory cache settings (shared by all workers on a host)
+    SHARED_CACHE_ENABLED: bool = False
+    SHARED_CACHE_PATH: Optional[str] = None
+    SHARED_CACHE_SLOTS: int = 65536
+    
+    # Decoded pixel cache settings
+    PIXEL_CACHE_ENABLED: bool = False
+    PIXEL_CACHE_DIR: Optional[str] = None
+    PIXEL_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB
+    PIXEL_CACHE_MAX_DIMENSION: int = 512
+    
+    # Ingest transcoding settings
+    TRANSCODE_ENABLED: bool = False
+    TRANSCODE_FORMAT: str = "webp"  # webp or jpeg
+    TRANSCODE_MAX_DIMENSION: int = 2048
+    TRANSCODE_QUALITY: int = 82
+    TRANSCODE_KEEP_ORIGINAL: bool = False
+    TRANSCODE_WORKERS: int = 2
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
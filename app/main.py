@@ -3,29 +3,95 @@ FastAPI Backend Service for Image Analysis
 Handles image uploads and mock analysis for mobile applications
 """
 
+from app.utils.startup import timer as startup_timer, warm_up, start_background_warm_up
+
 from fastapi import FastAPI, UploadFile, File, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import logging
+import asyncio
 from typing import Optional
 import uuid
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+startup_timer.mark("import:framework")
+
+from app.config import settings
+
+startup_timer.mark("config")
+
 from app.routes.upload import router as upload_router
 from app.routes.analyze import router as analyze_router
-from app.config import settings
+from app.routes.events import router as events_router
+from app.routes.export import router as export_router
+from app.routes.stats import router as stats_router
+from app.routes.admin import router as admin_router
 from app.utils.auth import verify_api_key
 from app.utils.logger import setup_logger
+from app.utils.transcode import check_transcode_settings, shutdown_transcode_pool
+from app.utils.memory import RouteMemoryMiddleware
+from app.utils.profiler import RouteContextMiddleware
+from app.utils.lanes import shutdown_lanes
+from app.utils.result_store import get_result_store
+from app.utils.key_registry import get_key_registry, close_key_registry
+from app.utils.aggregates import get_aggregates, persist_periodically
+
+startup_timer.mark("import:routes")
 
 # Setup logging
 logger = setup_logger(__name__)
 
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    # Fail fast on an invalid transcoding configuration instead of on every upload
+    if settings.TRANSCODE_ENABLED:
+        check_transcode_settings()
+    
+    # Load deferred dependencies, in the background when LAZY_STARTUP is set
+    if not settings.LAZY_STARTUP:
+        warm_up()
+    elif settings.STARTUP_WARM_UP:
+        start_background_warm_up()
+    
+    # Load the API key registry and start watching it before serving requests
+    get_key_registry()
+    
+    # Open the result store (and index existing uploads) before accepting uploads
+    get_result_store()
+    
+    # Load aggregate statistics and merge new counts into their file periodically
+    aggregates = get_aggregates()
+    persist_task = None
+    if aggregates is not None:
+        persist_task = asyncio.create_task(
+            persist_periodically(aggregates, settings.AGGREGATES_PERSIST_SECONDS)
+        )
+    startup_timer.mark("startup")
+    logger.info(f"Startup complete in {startup_timer.total_ms()} ms")
+    
+    yield
+    
+    if persist_task is not None:
+        persist_task.cancel()
+        aggregates.persist()
+    close_key_registry()
+    
+    # Stop background worker pools
+    shutdown_transcode_pool()
+    shutdown_lanes()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Image Analysis API",
     description="Backend service for image upload and analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -37,16 +103,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route peak allocations (active only while tracemalloc is tracing)
+app.add_middleware(RouteMemoryMiddleware)
+
+# Lets lane threads attribute profiler samples to the request's route
+app.add_middleware(RouteContextMiddleware)
+
 # Create uploads directory if it doesn't exist
 Path(settings.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 
 # Include routers
 app.include_router(upload_router, prefix="/api", tags=["Image Upload"])
 app.include_router(analyze_router, prefix="/api", tags=["Analysis"])
+app.include_router(events_router, prefix="/api", tags=["Analysis Events"])
+app.include_router(export_router, prefix="/api", tags=["Export"])
+app.include_router(stats_router, prefix="/api", tags=["Statistics"])
+app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
+
+startup_timer.mark("app:build")
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint - API health check"""
     logger.info("Health check request received")
     return {
@@ -55,19 +133,47 @@ def read_root():
         "endpoints": {
             "upload": "POST /api/upload",
             "analyze": "POST /api/analyze",
+            "events": "GET /api/events (SSE), WS /api/ws",
+            "export": "GET /api/export",
+            "stats": "GET /api/stats",
             "health": "GET /"
         }
     }
 
 
 @app.get("/health")
-def health_check():
-    """Health check endpoint"""
+async def health_check():
+    """
+    Health check endpoint
+    
+    Runs directly on the event loop, never on a thread pool, so it stays
+    responsive while the upload and analysis lanes are saturated.
+    """
     logger.info("Health check endpoint called")
     return {"status": "healthy"}
 
 
 if __name__ == "__main__":
-    import uvicorn
-    logger.info("Starting Image Analysis API")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Image Analysis API")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print startup-phase and import timings, then exit")
+    parser.add_argument("--top", type=int, default=20,
+                        help="Number of slowest imports to list in the startup report")
+    args = parser.parse_args()
+    
+    if args.startup_report:
+        import asyncio
+        from app.utils.startup import print_startup_report
+        
+        async def run_lifespan():
+            async with lifespan(app):
+                pass
+        
+        asyncio.run(run_lifespan())
+        print_startup_report(top=args.top, lazy=settings.LAZY_STARTUP)
+    else:
+        import uvicorn
+        logger.info("Starting Image Analysis API")
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,218 @@
+"""
+Operational endpoints (admin key required)
+"""
+
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.config import settings
+from app.utils.auth import verify_admin_key
+from app.utils.profiler import StackSampler, route_code_map, to_collapsed, to_speedscope
+from app.utils import memory
+from app.utils.lanes import lane_metrics
+from app.utils import deadline
+from app.utils import transcode
+from app.utils.pixel_cache import get_pixel_cache
+from app.utils.shared_cache import get_shared_cache
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+router = APIRouter()
+
+_profile_lock = asyncio.Lock()
+
+
+@router.get("/profile")
+async def profile(
+    request: Request,
+    seconds: float = Query(5.0, gt=0),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    interval_ms: Optional[float] = Query(None, ge=1),
+    x_admin_key: Optional[str] = Header(None)
+):
+    """
+    Sample the stacks of all threads for a number of seconds
+    
+    Args:
+        seconds: Sampling duration (capped at PROFILER_MAX_SECONDS)
+        format: "collapsed" (flamegraph.pl / speedscope import) or "speedscope" JSON
+        interval_ms: Sampling interval, defaults to PROFILER_INTERVAL_MS
+        x_admin_key: Admin key header (required)
+        
+    Returns:
+        Collapsed stacks as text, or a speedscope document
+        
+    Raises:
+        HTTPException: 409 if a profile is already running
+    """
+    verify_admin_key(x_admin_key)
+    
+    if _profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running"
+        )
+    
+    seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+    interval = (interval_ms or settings.PROFILER_INTERVAL_MS) / 1000
+    
+    async with _profile_lock:
+        logger.info(f"Profiling for {seconds}s at {interval * 1000:.1f}ms interval")
+        sampler = StackSampler(route_code_map(request.app.routes), interval=interval)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, sampler.stop)
+    
+    overhead = sampler.overhead_seconds / sampler.duration if sampler.duration else 0.0
+    logger.info(
+        f"Profile complete: {sampler.sample_count} samples, "
+        f"sampler overhead {overhead:.2%}"
+    )
+    headers = {
+        "X-Profile-Samples": str(sampler.sample_count),
+        "X-Profile-Overhead": f"{overhead:.4f}",
+    }
+    
+    if format == "speedscope":
+        return JSONResponse(to_speedscope(sampler), headers=headers)
+    return PlainTextResponse(to_collapsed(sampler), headers=headers)
+
+
+@router.get("/memory")
+def memory_usage(x_admin_key: Optional[str] = Header(None)):
+    """
+    Memory gauges, per-route peak allocations and tracing state
+    
+    Args:
+        x_admin_key: Admin key header (required)
+    """
+    verify_admin_key(x_admin_key)
+    return memory.memory_report()
+
+
+@router.post("/memory/snapshot")
+async def memory_snapshot(
+    top: int = Query(20, ge=1, le=500),
+    frames: int = Query(1, ge=1, le=50),
+    x_admin_key: Optional[str] = Header(None)
+):
+    """
+    Start tracemalloc if needed and take a baseline snapshot
+    
+    Args:
+        top: Number of allocation sites to return
+        frames: Traceback depth recorded per allocation (when starting tracing)
+        x_admin_key: Admin key header (required)
+        
+    Returns:
+        Largest allocation sites in the new baseline
+    """
+    verify_admin_key(x_admin_key)
+    stats = await run_in_threadpool(memory.snapshots.take, top, frames)
+    return {"top": stats}
+
+
+@router.get("/memory/diff")
+async def memory_diff(
+    top: int = Query(20, ge=1, le=500),
+    x_admin_key: Optional[str] = Header(None)
+):
+    """
+    Compare the current heap with the last baseline snapshot
+    
+    Args:
+        top: Number of allocation sites to return
+        x_admin_key: Admin key header (required)
+        
+    Raises:
+        HTTPException: 409 if no baseline snapshot has been taken
+    """
+    verify_admin_key(x_admin_key)
+    stats = await run_in_threadpool(memory.snapshots.diff, top)
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Take a snapshot first: POST /api/admin/memory/snapshot"
+        )
+    return {"top": stats}
+
+
+@router.delete("/memory/tracing")
+def memory_stop_tracing(x_admin_key: Optional[str] = Header(None)):
+    """
+    Stop tracemalloc and drop the baseline snapshot
+    
+    Args:
+        x_admin_key: Admin key header (required)
+    """
+    verify_admin_key(x_admin_key)
+    memory.snapshots.stop()
+    return {"tracing": False}
+
+
+@router.get("/lanes")
+def execution_lanes(x_admin_key: Optional[str] = Header(None)):
+    """
+    Saturation metrics for each execution lane
+    
+    Args:
+        x_admin_key: Admin key header (required)
+    """
+    verify_admin_key(x_admin_key)
+    return lane_metrics()
+
+
+@router.get("/deadlines")
+def deadline_counters(x_admin_key: Optional[str] = Header(None)):
+    """
+    Requests abandoned on deadline or disconnect, and the capacity recovered
+    
+    Args:
+        x_admin_key: Admin key header (required)
+    """
+    verify_admin_key(x_admin_key)
+    lanes = lane_metrics()
+    return {
+        **deadline.counters.snapshot(),
+        "lanes": {
+            name: {
+                "cancelled_queued": metrics["cancelled_queued"],
+                "abandoned_running": metrics["abandoned_running"],
+            }
+            for name, metrics in lanes.items()
+        },
+    }
+
+
+@router.get("/transcode")
+def transcode_report(x_admin_key: Optional[str] = Header(None)):
+    """
+    Bytes received vs stored by ingest transcoding in this worker process
+    
+    Args:
+        x_admin_key: Admin key header (required)
+    """
+    verify_admin_key(x_admin_key)
+    return {"enabled": settings.TRANSCODE_ENABLED, **transcode.stats.report()}
+
+
+@router.get("/caches")
+def cache_stats(x_admin_key: Optional[str] = Header(None)):
+    """
+    Occupancy and hit counters of the caches (null when disabled)
+    
+    Args:
+        x_admin_key: Admin key header (required)
+    """
+    verify_admin_key(x_admin_key)
+    pixel_cache = get_pixel_cache()
+    shared = get_shared_cache()
+    return {
+        "pixel_cache": pixel_cache.stats() if pixel_cache is not None else None,
+        "shared_cache": shared.stats() if shared is not None else None,
+    }
@@ -2,12 +2,18 @@
 Image analysis endpoint
 """
 
-from fastapi import APIRouter, Header, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Request, status
 from pydantic import BaseModel
-from typing import List
-from app.utils.validators import image_exists
+from typing import Dict, List
+from app.config import settings
+from app.utils.validators import find_image_path
 from app.utils.auth import verify_api_key
-from app.utils.analysis import MockAnalyzer
+from app.utils import events, shared_cache
+from app.utils.pixel_cache import get_pixel_cache
+from app.utils.lanes import get_lane
+from app.utils.deadline import Deadline
+from app.utils.result_store import get_result_store
+from app.utils.aggregates import get_aggregates
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -15,6 +21,40 @@ logger = setup_logger(__name__)
 router = APIRouter()
 
 
+def get_analyzer():
+    """Analyzer engine, imported on first use to keep startup fast"""
+    from app.utils.analysis import MockAnalyzer
+    return MockAnalyzer
+
+
+def _run_analysis(image_id: str, image_path: str) -> Dict:
+    """Decode (or map cached pixels), analyze an image and store the result"""
+    # Map cached pixels instead of decoding the upload again
+    pixels = None
+    pixel_cache = get_pixel_cache()
+    if pixel_cache is not None:
+        pixels = pixel_cache.load(image_id, image_path)
+    
+    # Perform analysis using mock analyzer
+    events.broker.publish(image_id, events.STAGE_ANALYZING)
+    try:
+        result = get_analyzer().analyze_image(image_id, pixels=pixels)
+    finally:
+        if pixels is not None:
+            pixels.close()
+    
+    # Keep the result for bulk export
+    store = get_result_store()
+    if store is not None:
+        store.record_analysis(result)
+    
+    # Count it in the running statistics
+    aggregates = get_aggregates()
+    if aggregates is not None:
+        aggregates.record(result)
+    return result
+
+
 class AnalysisRequest(BaseModel):
     """Request model for analysis endpoint"""
     image_id: str
@@ -31,6 +71,7 @@ class AnalysisResponse(BaseModel):
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_image(
     request: AnalysisRequest,
+    http_request: Request,
     x_api_key: str = Header(...)
 ):
     """
@@ -38,32 +79,62 @@ async def analyze_image(
     
     Args:
         request: AnalysisRequest with image_id
+        http_request: Incoming request (deadline header, disconnect detection)
         x_api_key: API key header (required)
         
     Returns:
         AnalysisResponse with analysis results
         
     Raises:
-        HTTPException: If image not found or analysis fails
+        HTTPException: If image not found or analysis fails, or 504/499 if
+            the request deadline passes or the client disconnects
     """
     # Verify API key
-    verify_api_key(x_api_key)
+    verify_api_key(x_api_key, route="/api/analyze")
     
     logger.info(f"Analysis request received for image: {request.image_id}")
+    events.broker.publish(request.image_id, events.STAGE_QUEUED)
+    
+    # A disconnected client only cancels the work if no progress stream wants it
+    deadline = Deadline.from_request(
+        http_request,
+        settings.ANALYZE_DEADLINE_SECONDS,
+        deliverable=lambda: events.broker.has_subscribers(request.image_id)
+    )
     
     # Check if image exists
-    if not image_exists(request.image_id):
+    image_path = find_image_path(request.image_id)
+    if image_path is None:
         logger.warning(f"Image not found: {request.image_id}")
+        events.broker.publish(request.image_id, events.STAGE_FAILED)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Image with ID '{request.image_id}' not found"
         )
     
     try:
-        # Perform analysis using mock analyzer
-        analysis_result = MockAnalyzer.analyze_image(request.image_id)
+        events.broker.publish(request.image_id, events.STAGE_DECODING)
+        
+        # Reuse a result computed by any worker on this host
+        cache = shared_cache.get_shared_cache()
+        cached = cache.get(shared_cache.KIND_ANALYSIS, request.image_id) if cache else None
+        
+        if cached is not None:
+            analysis_result = shared_cache.decode_analysis_record(request.image_id, cached)
+        else:
+            analysis_result = await deadline.run(
+                get_lane("analysis").run(_run_analysis, request.image_id, image_path),
+                "analysis"
+            )
+            if cache is not None:
+                cache.put(
+                    shared_cache.KIND_ANALYSIS,
+                    request.image_id,
+                    shared_cache.encode_analysis_record(analysis_result)
+                )
         
         logger.info(f"Analysis completed for {request.image_id}")
+        events.broker.publish(request.image_id, events.STAGE_DONE, result=analysis_result)
         
         return AnalysisResponse(
             image_id=analysis_result["image_id"],
@@ -73,9 +144,12 @@ async def analyze_image(
         )
         
     except HTTPException:
+        if deadline.cancelled.is_set():
+            events.broker.publish(request.image_id, events.STAGE_FAILED)
         raise
     except Exception as e:
         logger.error(f"Analysis failed for {request.image_id}: {str(e)}")
+        events.broker.publish(request.image_id, events.STAGE_FAILED)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to analyze image"
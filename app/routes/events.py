@@ -0,0 +1,158 @@
+"""
+Analysis progress streaming endpoints (Server-Sent Events and WebSocket)
+"""
+
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.utils.auth import verify_api_key
+from app.utils.events import broker
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+router = APIRouter()
+
+
+def _parse_image_ids(image_ids: str) -> list:
+    """Split a comma separated list of image IDs"""
+    return [image_id.strip() for image_id in image_ids.split(",") if image_id.strip()]
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    image_ids: str = Query(..., description="Comma separated image IDs"),
+    x_api_key: str = Header(...)
+):
+    """
+    Stream analysis progress for one or more images as Server-Sent Events
+
+    Args:
+        image_ids: Comma separated image IDs to subscribe to
+        x_api_key: API key header (required)
+
+    Returns:
+        text/event-stream response with one event per analysis stage
+
+    Raises:
+        HTTPException: 400 if no image IDs or more than EVENTS_MAX_SUBSCRIPTIONS are given
+    """
+    # Verify API key
+    verify_api_key(x_api_key, route="/api/events")
+
+    ids = _parse_image_ids(image_ids)
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one image_id is required"
+        )
+
+    subscription = broker.subscription(
+        max_queue=settings.EVENTS_QUEUE_SIZE,
+        max_image_ids=settings.EVENTS_MAX_SUBSCRIPTIONS
+    )
+    try:
+        subscription.subscribe(ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    logger.info(f"SSE subscription opened for {len(ids)} image(s)")
+
+    async def event_source():
+        try:
+            while True:
+                event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+            logger.info("SSE subscription closed")
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    api_key: Optional[str] = Query(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Multiplexed analysis progress over a WebSocket
+
+    Clients send JSON messages of the form
+    {"action": "subscribe" | "unsubscribe", "image_ids": [...]}
+    and receive the same event objects as the SSE endpoint. A subscribe
+    that would exceed EVENTS_MAX_SUBSCRIPTIONS is rejected with an error
+    message and changes nothing.
+    The API key may be passed as header or, for browsers, as ?api_key=.
+    """
+    try:
+        verify_api_key(x_api_key or api_key, route="/api/ws")
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    await websocket.accept()
+    subscription = broker.subscription(
+        max_queue=settings.EVENTS_QUEUE_SIZE,
+        max_image_ids=settings.EVENTS_MAX_SUBSCRIPTIONS
+    )
+    logger.info("WebSocket subscription opened")
+
+    async def pump_events():
+        while True:
+            event = await subscription.get()
+            await websocket.send_json(event)
+
+    sender = asyncio.create_task(pump_events())
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"error": "Invalid JSON message"})
+                continue
+            action = message.get("action") if isinstance(message, dict) else None
+            ids = message.get("image_ids", []) if isinstance(message, dict) else []
+            if not isinstance(ids, list):
+                ids = [ids]
+            ids = [str(image_id) for image_id in ids]
+
+            if action == "subscribe":
+                try:
+                    subscription.subscribe(ids)
+                except ValueError as e:
+                    await websocket.send_json({"error": str(e)})
+                    continue
+            elif action == "unsubscribe":
+                subscription.unsubscribe(ids)
+            else:
+                await websocket.send_json({"error": f"Unknown action: {action}"})
+                continue
+            await websocket.send_json({"action": action, "image_ids": sorted(subscription.image_ids)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        # Collect the sender's outcome, e.g. a send after the client went away
+        result, = await asyncio.gather(sender, return_exceptions=True)
+        if isinstance(result, Exception):
+            logger.warning(f"WebSocket event sender failed: {str(result)}")
+        subscription.close()
+        logger.info("WebSocket subscription closed")
@@ -0,0 +1,86 @@
+"""
+Bulk export of stored images and analysis results
+"""
+
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.utils.auth import verify_api_key
+from app.utils.lanes import get_lane
+from app.utils.result_store import csv_header, get_result_store, to_timestamp
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@router.get("/export")
+async def export_results(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    cursor: int = Query(0, ge=0),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    x_api_key: str = Header(...)
+):
+    """
+    Stream every stored image with its latest analysis result
+
+    Rows are read in batches on the export lane, so memory stays bounded
+    and uploads and analyses keep their own workers.
+
+    Args:
+        format: "ndjson" (one JSON object per line) or "csv"
+        cursor: Resume after the row with this cursor
+        since: Only images uploaded at or after this time (UTC if no offset)
+        until: Only images uploaded before this time (UTC if no offset)
+        x_api_key: API key header (required)
+
+    Returns:
+        Streaming NDJSON or CSV; every row carries its cursor
+
+    Raises:
+        HTTPException: 404 if the result store is disabled, 503 if the
+            export lane is saturated
+    """
+    # Verify API key
+    verify_api_key(x_api_key, route="/api/export")
+
+    store = get_result_store()
+    if store is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Result store is disabled"
+        )
+
+    since_ts, until_ts = to_timestamp(since), to_timestamp(until)
+    batch_size = settings.EXPORT_BATCH_SIZE
+    lane = get_lane("export")
+    logger.info(f"Export started: format={format} cursor={cursor}")
+
+    # Fetch the first batch before responding so a saturated lane still gets a 503
+    first = await lane.run(store.export_batch, format, cursor, batch_size, since_ts, until_ts)
+
+    async def stream():
+        chunk, after, count = first
+        total = count
+        if format == "csv":
+            yield csv_header()
+        while count:
+            yield chunk
+            if count < batch_size:
+                break
+            chunk, after, count = await lane.run(
+                store.export_batch, format, after, batch_size, since_ts, until_ts
+            )
+            total += count
+        logger.info(f"Export finished: {total} row(s), last cursor {after}")
+
+    return StreamingResponse(stream(), media_type=MEDIA_TYPES[format])
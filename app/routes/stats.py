@@ -0,0 +1,48 @@
+"""
+Aggregate statistics endpoint
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from app.utils.auth import verify_api_key
+from app.utils.aggregates import get_aggregates
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def get_stats(
+    bucket: Optional[str] = Query(None, pattern="^(hour|day)$"),
+    limit: Optional[int] = Query(None, ge=1),
+    x_api_key: str = Header(...)
+):
+    """
+    Distributions of skin types, detected issues and confidence
+
+    Served from running counters; no stored results are read.
+
+    Args:
+        bucket: "hour" or "day" to also return per-bucket statistics
+        limit: Number of most recent buckets to return
+        x_api_key: API key header (required)
+
+    Returns:
+        Totals and, if requested, time buckets (oldest first)
+
+    Raises:
+        HTTPException: 404 if aggregates are disabled
+    """
+    # Verify API key
+    verify_api_key(x_api_key, route="/api/stats")
+
+    aggregates = get_aggregates()
+    if aggregates is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aggregate statistics are disabled"
+        )
+
+    return aggregates.stats(bucket=bucket, limit=limit)
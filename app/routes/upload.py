@@ -2,14 +2,21 @@
 Image upload endpoint
 """
 
-from fastapi import APIRouter, UploadFile, File, Header, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Request, status
 from pydantic import BaseModel
+from typing import Optional
 import uuid
 import os
+from contextlib import suppress
 from app.config import settings
 from app.utils.validators import validate_file_upload, validate_image
 from app.utils.auth import verify_api_key
 from app.utils.logger import setup_logger
+from app.utils import memory, shared_cache
+from app.utils.transcode import original_path, transcode_upload
+from app.utils.lanes import get_lane
+from app.utils.deadline import Deadline
+from app.utils.result_store import get_result_store
 
 logger = setup_logger(__name__)
 
@@ -22,10 +29,39 @@ class UploadResponse(BaseModel):
     filename: str
     size: int
     message: str
+    stored_size: Optional[int] = None
+
+
+def _store_upload(contents: bytes, file_path: str, deadline: Deadline) -> None:
+    """Write the upload to disk and check that it is a valid image"""
+    with open(file_path, "wb") as f:
+        f.write(contents)
+    if deadline.cancelled.is_set():
+        # Request was abandoned while we were writing; nobody will use this file.
+        # The request may have removed it already.
+        with suppress(FileNotFoundError):
+            os.remove(file_path)
+        return
+    try:
+        validate_image(file_path)
+    except Exception:
+        if deadline.cancelled.is_set():
+            # The abandoned request removed the file while we validated it
+            return
+        raise
+
+
+def _discard_upload(*paths: Optional[str]) -> None:
+    """Remove files written for an abandoned upload"""
+    for path in paths:
+        if path:
+            with suppress(FileNotFoundError):
+                os.remove(path)
 
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_image(
+    request: Request,
     file: UploadFile = File(...),
     x_api_key: str = Header(...)
 ):
@@ -33,6 +69,7 @@ async def upload_image(
     Upload an image file
     
     Args:
+        request: Incoming request (deadline header, disconnect detection)
         file: Image file (JPEG or PNG)
         x_api_key: API key header (required)
         
@@ -40,17 +77,29 @@ async def upload_image(
         UploadResponse with image_id
         
     Raises:
-        HTTPException: If file validation fails
+        HTTPException: If file validation fails, or 504/499 if the request
+            deadline passes or the client disconnects
     """
     # Verify API key
-    verify_api_key(x_api_key)
+    verify_api_key(x_api_key, route="/api/upload")
     
     logger.info(f"Upload request received for file: {file.filename}")
+    deadline = Deadline.from_request(request, settings.UPLOAD_DEADLINE_SECONDS)
+    
+    # Account for the multipart spool file and the read buffer while we hold them
+    spool_size = file.size or 0
+    spool_gauge = memory.spool_gauge_for(file.file)
+    spool_gauge.add(spool_size)
+    in_flight = 0
+    file_path = None
+    stored_path = None
     
     try:
         # Read file content
         contents = await file.read()
         file_size = len(contents)
+        in_flight = file_size
+        memory.upload_in_flight_bytes.add(in_flight)
         
         # Validate file
         validate_file_upload(file.filename, file_size)
@@ -61,13 +110,34 @@ async def upload_image(
         # Get file extension
         file_ext = file.filename.split('.')[-1].lower()
         
-        # Save file
+        # Save file and validate image on the upload lane
         file_path = os.path.join(settings.UPLOAD_DIR, f"{image_id}.{file_ext}")
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        await deadline.run(get_lane("upload").run(_store_upload, contents, file_path, deadline), "store")
         
-        # Validate image
-        validate_image(file_path)
+        # Re-encode to the compact storage format
+        stored_path, stored_ext, stored_size = file_path, file_ext, file_size
+        if settings.TRANSCODE_ENABLED:
+            stored_path, stored_ext, stored_size = await deadline.run(
+                transcode_upload(image_id, file_path, file_ext), "transcode"
+            )
+        
+        await deadline.checkpoint("respond")
+        
+        # Publish metadata to the cross-worker cache
+        cache = shared_cache.get_shared_cache()
+        if cache is not None:
+            cache.put(
+                shared_cache.KIND_IMAGE,
+                image_id,
+                shared_cache.encode_image_record(stored_ext, stored_size)
+            )
+        
+        # Record the image for bulk export
+        store = get_result_store()
+        if store is not None:
+            await get_lane("upload").run(
+                store.record_upload, image_id, file.filename, file_size, stored_ext, stored_size
+            )
         
         logger.info(f"File uploaded successfully: {image_id} ({file.filename})")
         
@@ -75,10 +145,16 @@ async def upload_image(
             image_id=image_id,
             filename=file.filename,
             size=file_size,
-            message="Image uploaded successfully"
+            message="Image uploaded successfully",
+            stored_size=stored_size
         )
         
     except HTTPException:
+        if deadline.cancelled.is_set():
+            kept_original = None
+            if file_path and settings.TRANSCODE_ENABLED and settings.TRANSCODE_KEEP_ORIGINAL:
+                kept_original = original_path(file_path)
+            _discard_upload(file_path, stored_path, kept_original)
         raise
     except Exception as e:
         logger.error(f"Upload failed: {str(e)}")
@@ -86,3 +162,6 @@ async def upload_image(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process upload"
         )
+    finally:
+        memory.upload_in_flight_bytes.sub(in_flight)
+        spool_gauge.sub(spool_size)
@@ -0,0 +1,290 @@
+"""
+Incremental aggregate statistics over analysis results
+
+Every new result bumps a handful of counters (skin types, detected issues, a
+fixed-bucket confidence histogram) overall and in its hour and day bucket,
+so statistics are never recomputed from stored results. Counts are merged
+into a JSON file periodically; worker processes sharing the file each add
+only what they recorded since their last merge, so all of them converge on
+the same totals.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from app.config import settings
+from app.utils.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process only, guarded by the thread lock
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+# Confidence histogram: fixed buckets of width 0.05 over [0, 1]
+HISTOGRAM_BUCKETS = 20
+
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+
+FILE_VERSION = 1
+
+
+def _empty() -> Dict:
+    return {
+        "count": 0,
+        "confidence_sum": 0.0,
+        "skin_types": {},
+        "detected_issues": {},
+        "confidence_histogram": [0] * HISTOGRAM_BUCKETS,
+    }
+
+
+def _add_result(aggregate: Dict, result: Dict) -> None:
+    confidence = float(result["confidence"])
+    aggregate["count"] += 1
+    aggregate["confidence_sum"] += confidence
+    skin_types = aggregate["skin_types"]
+    skin_types[result["skin_type"]] = skin_types.get(result["skin_type"], 0) + 1
+    issues = aggregate["detected_issues"]
+    for issue in result["detected_issues"]:
+        issues[issue] = issues.get(issue, 0) + 1
+    index = min(max(int(confidence * HISTOGRAM_BUCKETS), 0), HISTOGRAM_BUCKETS - 1)
+    aggregate["confidence_histogram"][index] += 1
+
+
+def _merge(into: Dict, other: Dict) -> None:
+    into["count"] += other["count"]
+    into["confidence_sum"] += other["confidence_sum"]
+    for field in ("skin_types", "detected_issues"):
+        counts = into[field]
+        for key, value in other[field].items():
+            counts[key] = counts.get(key, 0) + value
+    into["confidence_histogram"] = [
+        a + b for a, b in zip(into["confidence_histogram"], other["confidence_histogram"])
+    ]
+
+
+def _empty_state() -> Dict:
+    return {"total": _empty(), "hour": {}, "day": {}}
+
+
+def _merge_state(into: Dict, other: Dict) -> None:
+    _merge(into["total"], other["total"])
+    for bucket in BUCKET_SECONDS:
+        buckets = into[bucket]
+        for start, aggregate in other[bucket].items():
+            if start in buckets:
+                _merge(buckets[start], aggregate)
+            else:
+                buckets[start] = copy.deepcopy(aggregate)
+
+
+def _trim(state: Dict) -> None:
+    """Drop time buckets beyond the configured retention"""
+    for bucket, retention in (
+        ("hour", settings.AGGREGATES_HOURLY_RETENTION),
+        ("day", settings.AGGREGATES_DAILY_RETENTION),
+    ):
+        buckets = state[bucket]
+        starts = sorted(buckets, key=int)
+        for start in starts[:max(len(starts) - retention, 0)]:
+            del buckets[start]
+
+
+def _view(aggregate: Dict) -> Dict:
+    count = aggregate["count"]
+    return {
+        "count": count,
+        "mean_confidence": round(aggregate["confidence_sum"] / count, 4) if count else None,
+        "skin_types": dict(aggregate["skin_types"]),
+        "detected_issues": dict(aggregate["detected_issues"]),
+        "confidence_histogram": list(aggregate["confidence_histogram"]),
+    }
+
+
+class Aggregates:
+    """
+    Running totals, persisted to ``path``
+
+    ``_base`` holds the merged file contents as of the last persist and
+    ``_delta`` what this process recorded since; a read combines them,
+    which costs the same however many results have been recorded. While a
+    persist is merging, the counts it took from ``_delta`` sit in
+    ``_persisting`` so reads still include them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._base = _empty_state()
+        self._delta = _empty_state()
+        self._persisting = _empty_state()
+        self.persisted_at: Optional[float] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._base = self._read()
+
+    def record(self, result: Dict, at: Optional[float] = None) -> None:
+        """Count one analysis result"""
+        at = at or time.time()
+        with self._lock:
+            _add_result(self._delta["total"], result)
+            for bucket, seconds in BUCKET_SECONDS.items():
+                start = str(int(at // seconds * seconds))
+                buckets = self._delta[bucket]
+                if start not in buckets:
+                    buckets[start] = _empty()
+                _add_result(buckets[start], result)
+
+    def stats(self, bucket: Optional[str] = None, limit: Optional[int] = None) -> Dict:
+        """
+        Current statistics
+
+        Args:
+            bucket: None for totals only, or "hour" / "day" to add per-bucket stats
+            limit: Number of most recent buckets to include
+
+        Returns:
+            Totals, plus the most recent buckets (oldest first) if requested
+        """
+        with self._lock:
+            states = (self._base, self._persisting, self._delta)
+            total = _empty()
+            for state in states:
+                _merge(total, state["total"])
+            response = {"total": _view(total)}
+            if bucket is not None:
+                sources = [state[bucket] for state in states]
+                starts = sorted(set().union(*sources), key=int)
+                if limit:
+                    starts = starts[-limit:]
+                buckets = []
+                for start in starts:
+                    aggregate = _empty()
+                    for source in sources:
+                        if start in source:
+                            _merge(aggregate, source[start])
+                    view = _view(aggregate)
+                    view["start"] = datetime.fromtimestamp(int(start), timezone.utc).isoformat().replace("+00:00", "Z")
+                    buckets.append(view)
+                response["bucket"] = bucket
+                response["buckets"] = buckets
+            response["confidence_bucket_width"] = 1 / HISTOGRAM_BUCKETS
+            response["persisted_at"] = self.persisted_at
+        return response
+
+    def _load(self) -> Dict:
+        """
+        Parse the file; a missing file is an empty state
+
+        Raises:
+            OSError, ValueError, KeyError, TypeError: If the file exists but
+                cannot be read or has an unsupported format
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return _empty_state()
+        version = data.get("version") if isinstance(data, dict) else None
+        if version != FILE_VERSION:
+            raise ValueError(f"unsupported version {version}")
+        state = _empty_state()
+        _merge_state(state, data)
+        return state
+
+    def _read(self) -> Dict:
+        try:
+            return self._load()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to load aggregates from {self.path}, starting empty: {str(e)}")
+            return _empty_state()
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def persist(self) -> None:
+        """
+        Merge this process's new counts into the file
+
+        The file is replaced atomically, so a crash mid-write leaves the
+        previous version intact. A file that exists but cannot be read is
+        never overwritten; the counts are kept for the next attempt.
+        """
+        with self._lock:
+            # Counts stay visible to stats() until _base includes them
+            delta = self._persisting = self._delta
+            self._delta = _empty_state()
+
+        try:
+            with self._file_lock():
+                state = self._load()
+                _merge_state(state, delta)
+                _trim(state)
+                data = dict(state, version=FILE_VERSION, updated_at=time.time())
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump(data, f)
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+        except Exception as e:
+            logger.error(f"Failed to persist aggregates to {self.path}: {str(e)}")
+            with self._lock:
+                # Keep the counts for the next attempt
+                _merge_state(self._delta, delta)
+                self._persisting = _empty_state()
+            return
+
+        with self._lock:
+            self._base = state
+            self._persisting = _empty_state()
+            self.persisted_at = data["updated_at"]
+
+
+async def persist_periodically(aggregates: Aggregates, interval: float) -> None:
+    """Background task: merge new counts into the file every ``interval`` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(aggregates.persist)
+
+
+_aggregates: Optional[Aggregates] = None
+_aggregates_lock = threading.Lock()
+
+
+def get_aggregates() -> Optional[Aggregates]:
+    """
+    Process-wide aggregates, loaded from disk on first use
+
+    Returns:
+        Aggregates, or None if AGGREGATES_ENABLED is off
+    """
+    global _aggregates
+    if not settings.AGGREGATES_ENABLED:
+        return None
+    if _aggregates is None:
+        with _aggregates_lock:
+            if _aggregates is None:
+                _aggregates = Aggregates(
+                    settings.AGGREGATES_PATH or os.path.join(settings.UPLOAD_DIR, "aggregates.json")
+                )
+    return _aggregates
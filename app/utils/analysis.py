@@ -3,7 +3,7 @@ Mock analysis logic for image processing
 """
 
 import random
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -27,12 +27,13 @@ class MockAnalyzer:
     ]
     
     @staticmethod
-    def analyze_image(image_id: str) -> Dict:
+    def analyze_image(image_id: str, pixels: Optional[Any] = None) -> Dict:
         """
         Perform mock analysis on image
         
         Args:
             image_id: ID of the image to analyze
+            pixels: Decoded pixels (DecodedImage), ignored by the mock
             
         Returns:
             Dictionary with analysis results
@@ -2,20 +2,26 @@
 Authentication utilities
 """
 
+import hmac
 from fastapi import HTTPException, status
 from typing import Optional
 from app.config import settings
 from app.utils.logger import setup_logger
+from app.utils.key_registry import KeyRegistry, get_key_registry
 
 logger = setup_logger(__name__)
 
 
-def verify_api_key(api_key: Optional[str]) -> bool:
+def verify_api_key(api_key: Optional[str], route: Optional[str] = None) -> bool:
     """
     Verify API key for requests
     
+    Keys are checked against the key registry when API_KEY_REGISTRY_PATH is
+    set, otherwise against the single API_KEY setting.
+    
     Args:
         api_key: API key from request header
+        route: Route path being called, checked against the key's allowed routes
         
     Returns:
         True if valid, raises HTTPException if invalid
@@ -31,6 +37,10 @@ def verify_api_key(api_key: Optional[str]) -> bool:
             headers={"WWW-Authenticate": "Bearer"}
         )
     
+    registry = get_key_registry()
+    if registry is not None:
+        return _verify_registered_key(registry, api_key, route)
+    
     if api_key != settings.API_KEY:
         logger.warning(f"Invalid API key attempt: {api_key[:5]}...")
         raise HTTPException(
@@ -39,3 +49,67 @@ def verify_api_key(api_key: Optional[str]) -> bool:
         )
     
     return True
+
+
+def _verify_registered_key(registry: KeyRegistry, api_key: str, route: Optional[str]) -> bool:
+    """Check a key against the registry, its allowed routes and its quota"""
+    record = registry.lookup(api_key)
+    if record is None or not record.enabled:
+        logger.warning(f"Invalid API key attempt: {api_key[:5]}...")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid API key"
+        )
+    
+    if route is not None and record.routes is not None and route not in record.routes:
+        logger.warning(f"API key {record.key_id} ({record.tenant}) not allowed on {route}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="API key not allowed for this endpoint"
+        )
+    
+    retry_after = registry.consume_quota(record)
+    if retry_after is not None:
+        logger.warning(f"Quota exceeded for API key {record.key_id} ({record.tenant})")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="API key quota exceeded",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    return True
+
+
+def verify_admin_key(admin_key: Optional[str]) -> bool:
+    """
+    Verify the admin key for operational endpoints
+    
+    Admin endpoints are disabled unless ADMIN_API_KEY is configured.
+    
+    Args:
+        admin_key: Admin key from request header
+        
+    Returns:
+        True if valid, raises HTTPException if invalid
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    
+    if not admin_key:
+        logger.warning("Admin request received without admin key")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin key required"
+        )
+    
+    if not hmac.compare_digest(admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        logger.warning("Invalid admin key attempt")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
+    
+    return True
@@ -0,0 +1,167 @@
+"""
+Request deadlines and cancellation of work that can no longer be delivered
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException, Request, status
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+# Non-standard status used by nginx for "client closed request"
+STATUS_CLIENT_CLOSED_REQUEST = 499
+
+REASON_DEADLINE = "deadline"
+REASON_DISCONNECT = "disconnect"
+
+
+class WorkCounters:
+    """Requests cancelled per reason and stage, and the work they had consumed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled: Dict[str, Dict[str, int]] = {REASON_DEADLINE: {}, REASON_DISCONNECT: {}}
+        self.wasted_seconds = 0.0
+
+    def record(self, reason: str, stage: str, elapsed: float) -> None:
+        with self._lock:
+            stages = self.cancelled[reason]
+            stages[stage] = stages.get(stage, 0) + 1
+            self.wasted_seconds += elapsed
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "cancelled": {reason: dict(stages) for reason, stages in self.cancelled.items()},
+                "wasted_seconds": round(self.wasted_seconds, 3),
+            }
+
+
+counters = WorkCounters()
+
+
+class Deadline:
+    """
+    Time budget for one request, checked at each stage of its work
+
+    ``cancelled`` is set once the request is abandoned so that blocking code
+    already running in a worker thread can clean up after itself.
+    ``deliverable`` may report that the result still has another consumer
+    (e.g. a progress stream), in which case a client disconnect is ignored.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        request: Optional[Request] = None,
+        deliverable: Optional[Callable[[], bool]] = None
+    ):
+        self.started = time.monotonic()
+        self.expires_at = self.started + timeout
+        self.request = request
+        self.deliverable = deliverable
+        self.cancelled = threading.Event()
+
+    @classmethod
+    def from_request(
+        cls,
+        request: Request,
+        default_timeout: float,
+        deliverable: Optional[Callable[[], bool]] = None
+    ) -> "Deadline":
+        """
+        Deadline from the X-Request-Timeout-Ms header, or the route default
+
+        The client's budget is capped at REQUEST_DEADLINE_MAX_SECONDS.
+        """
+        timeout = default_timeout
+        header = request.headers.get(DEADLINE_HEADER)
+        if header:
+            try:
+                timeout = min(max(float(header) / 1000, 0.0), settings.REQUEST_DEADLINE_MAX_SECONDS)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="X-Request-Timeout-Ms must be a number of milliseconds"
+                )
+        return cls(timeout, request=request, deliverable=deliverable)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def _abandon(self, reason: str, stage: str) -> HTTPException:
+        self.cancelled.set()
+        elapsed = time.monotonic() - self.started
+        counters.record(reason, stage, elapsed)
+        logger.warning(f"Request abandoned at stage '{stage}' ({reason}) after {elapsed:.2f}s")
+        if reason == REASON_DEADLINE:
+            return HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=f"Request deadline exceeded during {stage}"
+            )
+        return HTTPException(
+            status_code=STATUS_CLIENT_CLOSED_REQUEST,
+            detail="Client closed request"
+        )
+
+    async def _disconnected(self) -> bool:
+        if self.request is None or not await self.request.is_disconnected():
+            return False
+        return not (self.deliverable is not None and self.deliverable())
+
+    async def checkpoint(self, stage: str) -> None:
+        """
+        Abandon the request if its deadline passed or the client went away
+
+        Raises:
+            HTTPException: 504 on deadline, 499 on client disconnect
+        """
+        if self.expired:
+            raise self._abandon(REASON_DEADLINE, stage)
+        if await self._disconnected():
+            raise self._abandon(REASON_DISCONNECT, stage)
+
+    async def run(self, awaitable: Awaitable, stage: str):
+        """
+        Await work, cancelling it when the deadline passes or the client leaves
+
+        Work queued on an execution lane that has not started yet is dropped
+        without running.
+
+        Raises:
+            HTTPException: 504 on deadline, 499 on client disconnect
+        """
+        try:
+            await self.checkpoint(stage)
+        except HTTPException:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise
+        task = asyncio.ensure_future(awaitable)
+        try:
+            while True:
+                timeout = min(self.remaining(), settings.DISCONNECT_POLL_SECONDS)
+                done, _ = await asyncio.wait({task}, timeout=timeout)
+                if done:
+                    return task.result()
+                if self.expired:
+                    reason = REASON_DEADLINE
+                    break
+                if await self._disconnected():
+                    reason = REASON_DISCONNECT
+                    break
+        except BaseException:
+            task.cancel()
+            raise
+        task.cancel()
+        raise self._abandon(reason, stage)
@@ -0,0 +1,198 @@
+"""
+In-process pub/sub for analysis progress events
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Analysis stages, in the order they are published
+STAGE_QUEUED = "queued"
+STAGE_DECODING = "decoding"
+STAGE_ANALYZING = "analyzing"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+
+class Subscription:
+    """
+    A single client connection subscribed to up to ``max_image_ids`` image IDs
+
+    Events for every subscribed image are delivered through one bounded
+    queue, so an idle subscriber costs one small object and one queue.
+    """
+
+    def __init__(self, broker: "EventBroker", max_queue: int = 100, max_image_ids: int = 100):
+        self._broker = broker
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.max_image_ids = max_image_ids
+        self.image_ids: Set[str] = set()
+        self.dropped = 0
+
+    def subscribe(self, image_ids: Iterable[str]) -> None:
+        """
+        Add image IDs to this subscription
+
+        Raises:
+            ValueError: If the subscription would exceed max_image_ids;
+                nothing is added in that case
+        """
+        image_ids = [image_id for image_id in image_ids if image_id]
+        if len(self.image_ids.union(image_ids)) > self.max_image_ids:
+            raise ValueError(f"At most {self.max_image_ids} image IDs per connection")
+        for image_id in image_ids:
+            if image_id and image_id not in self.image_ids:
+                self.image_ids.add(image_id)
+                # Catch up on the image's latest stage, e.g. an analysis that already finished
+                retained = self._broker._add(image_id, self)
+                if retained is not None:
+                    self.deliver(retained)
+
+    def unsubscribe(self, image_ids: Iterable[str]) -> None:
+        """Remove image IDs from this subscription"""
+        for image_id in image_ids:
+            if image_id in self.image_ids:
+                self.image_ids.discard(image_id)
+                self._broker._remove(image_id, self)
+
+    def close(self) -> None:
+        """Drop every image ID held by this subscription"""
+        self.unsubscribe(list(self.image_ids))
+
+    def deliver(self, event: Dict) -> None:
+        """Queue an event without blocking the publisher"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow consumer must never stall analysis; drop the oldest event
+            self.dropped += 1
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(event)
+            except (asyncio.QueueEmpty, asyncio.QueueFull):
+                pass
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Wait for the next event
+
+        Returns:
+            The next event, or None if the timeout expires first
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """
+    Fan-out of analysis events from the analyze endpoint to subscribers
+
+    Publishing is O(number of subscribers of that image). The last event
+    of each image is kept for ``retain_seconds`` (at most ``retain_max``
+    images, least recently published dropped first) and sent to
+    connections that subscribe later.
+    """
+
+    def __init__(self, retain_max: int = 10000, retain_seconds: float = 300.0):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.retain_max = retain_max
+        self.retain_seconds = retain_seconds
+        self._retained: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # Publishers may run on lane threads; retaining an event and choosing
+        # its subscribers must not interleave with a new subscription
+        self._lock = threading.Lock()
+
+    def subscription(self, max_queue: int = 100, max_image_ids: int = 100) -> Subscription:
+        """Create a new, empty subscription"""
+        self._loop = asyncio.get_running_loop()
+        return Subscription(self, max_queue=max_queue, max_image_ids=max_image_ids)
+
+    def _add(self, image_id: str, subscription: Subscription) -> Optional[Dict]:
+        """Register a subscriber; returns the image's retained event, if any"""
+        with self._lock:
+            self._subscribers.setdefault(image_id, set()).add(subscription)
+            retained = self._retained.get(image_id)
+            if retained is None:
+                return None
+            if time.monotonic() - retained[0] > self.retain_seconds:
+                del self._retained[image_id]
+                return None
+            return retained[1]
+
+    def _remove(self, image_id: str, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(image_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[image_id]
+
+    def _retain(self, image_id: str, event: Dict) -> None:
+        """Keep the image's latest event; the caller holds the lock"""
+        if self.retain_max <= 0:
+            return
+        self._retained[image_id] = (time.monotonic(), event)
+        self._retained.move_to_end(image_id)
+        while len(self._retained) > self.retain_max:
+            self._retained.popitem(last=False)
+
+    def has_subscribers(self, image_id: str) -> bool:
+        """True if any connection is following this image"""
+        return image_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        """Number of (image, subscription) pairs currently registered"""
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def publish(self, image_id: str, stage: str, result: Optional[Dict] = None) -> None:
+        """
+        Publish a stage event for an image
+
+        Safe to call from the event loop or from a worker thread.
+
+        Args:
+            image_id: Image the event belongs to
+            stage: One of the STAGE_* constants
+            result: Final analysis result, for the done stage
+        """
+        event = {"image_id": image_id, "stage": stage, "timestamp": time.time()}
+        if result is not None:
+            event["result"] = result
+
+        with self._lock:
+            self._retain(image_id, event)
+            # Later subscribers get this event from the retained copy instead
+            subscribers = list(self._subscribers.get(image_id, ()))
+        if not subscribers:
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is not None and running is self._loop:
+            self._dispatch(subscribers, event)
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._dispatch, subscribers, event)
+
+    @staticmethod
+    def _dispatch(subscribers, event: Dict) -> None:
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+
+broker = EventBroker(
+    retain_max=settings.EVENTS_RETAIN_MAX,
+    retain_seconds=settings.EVENTS_RETAIN_SECONDS
+)
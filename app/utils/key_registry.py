@@ -0,0 +1,295 @@
+"""
+Multi-key API key registry
+
+Keys are stored only as SHA-256 (or HMAC-SHA256 with API_KEY_PEPPER) hex
+digests in a JSON file or SQLite database, together with the tenant, a
+per-minute quota and the routes the key may call. Lookup is a single dict
+access on the digest, so auth cost does not depend on the number of keys.
+The source is re-read in a background thread when it changes and swapped in
+atomically.
+
+Usage:
+    python -m app.utils.key_registry hash <api-key>
+    python -m app.utils.key_registry generate --tenant <name> [--quota N] [--routes /api/upload,/api/analyze]
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+from app.config import settings
+from app.utils.logger import setup_logger
+from app.utils.quota import SharedQuota, default_quota_path
+
+logger = setup_logger(__name__)
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+@dataclass(frozen=True)
+class ApiKeyRecord:
+    """Attributes of one registered key"""
+    key_hash: str
+    key_id: str
+    tenant: str
+    quota_per_minute: Optional[int] = None
+    routes: Optional[FrozenSet[str]] = None  # None means every route
+    enabled: bool = True
+
+
+def hash_key(api_key: str, pepper: Optional[str] = None) -> str:
+    """Digest under which a key is stored"""
+    if pepper:
+        return hmac.new(pepper.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def _record_from_row(row: Dict) -> ApiKeyRecord:
+    # Only a missing/null value means every route; an empty list allows none
+    routes = row.get("routes")
+    if isinstance(routes, str):
+        routes = [route for route in routes.split(",") if route]
+    return ApiKeyRecord(
+        key_hash=row["key_hash"].lower(),
+        key_id=row.get("key_id") or row["key_hash"][:12],
+        tenant=row.get("tenant") or "default",
+        quota_per_minute=row.get("quota_per_minute"),
+        routes=frozenset(routes) if routes is not None else None,
+        enabled=bool(row.get("enabled", True)),
+    )
+
+
+def load_keys(path: str) -> Dict[str, ApiKeyRecord]:
+    """
+    Read every key from a JSON file or SQLite database
+
+    JSON: {"keys": [{"key_hash": ..., "tenant": ..., ...}]} or a bare list.
+    SQLite: table api_keys(key_hash, key_id, tenant, quota_per_minute,
+    routes (comma separated), enabled).
+    """
+    if path.endswith(SQLITE_EXTENSIONS):
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = (dict(row) for row in connection.execute(
+                "SELECT key_hash, key_id, tenant, quota_per_minute, routes, enabled FROM api_keys"
+            ))
+            return {record.key_hash: record for record in map(_record_from_row, rows)}
+        finally:
+            connection.close()
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rows = data["keys"] if isinstance(data, dict) else data
+    return {record.key_hash: record for record in map(_record_from_row, rows)}
+
+
+class KeyRegistry:
+    """
+    In-memory key table with a verified-key cache and hot reload
+
+    Quotas are counted in ``quota`` (shared by the workers on a host) when
+    given, otherwise in this process only.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        pepper: Optional[str] = None,
+        cache_size: int = 10000,
+        quota: Optional[SharedQuota] = None
+    ):
+        self.path = path
+        self.pepper = pepper
+        self.cache_size = cache_size
+        self.quota = quota
+        self._keys: Dict[str, ApiKeyRecord] = {}
+        self._signature: Optional[Tuple[float, int]] = None
+        self._cache: "OrderedDict[str, ApiKeyRecord]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._quota_lock = threading.Lock()
+        self._quota_windows: Dict[str, Tuple[int, int]] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reload()
+
+    def _source_signature(self) -> Tuple[float, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime, stat.st_size
+
+    def reload(self) -> bool:
+        """
+        Re-read the source if it changed
+
+        The new table replaces the old one in a single assignment, so
+        concurrent lookups see either the old or the new keys, never a mix.
+        A source that fails to load leaves the current keys in place.
+
+        Returns:
+            True if new keys were loaded
+        """
+        try:
+            signature = self._source_signature()
+            if signature == self._signature:
+                return False
+            keys = load_keys(self.path)
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            logger.error(f"Failed to load API key registry {self.path}: {str(e)}")
+            return False
+
+        self._keys = keys
+        self._signature = signature
+        with self._cache_lock:
+            self._cache.clear()
+        logger.info(f"Loaded {len(keys)} API key(s) from {self.path}")
+        return True
+
+    def start_watching(self, interval: float) -> None:
+        """Poll the source for changes in a daemon thread"""
+        def watch():
+            while not self._stop.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="key-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def lookup(self, api_key: str) -> Optional[ApiKeyRecord]:
+        """
+        Find the record for a presented key
+
+        Returns:
+            ApiKeyRecord, or None if the key is unknown
+        """
+        with self._cache_lock:
+            record = self._cache.get(api_key)
+            if record is not None:
+                self._cache.move_to_end(api_key)
+                return record
+
+        keys = self._keys
+        digest = hash_key(api_key, self.pepper)
+        record = keys.get(digest)
+        if record is None or not hmac.compare_digest(record.key_hash, digest):
+            return None
+
+        with self._cache_lock:
+            # Skip caching if a reload swapped the table meanwhile
+            if keys is self._keys:
+                self._cache[api_key] = record
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return record
+
+    def consume_quota(self, record: ApiKeyRecord) -> Optional[int]:
+        """
+        Count one request against the key's per-minute quota
+
+        Returns:
+            None if allowed, otherwise seconds until the window resets
+        """
+        if not record.quota_per_minute:
+            return None
+        if self.quota is not None:
+            return self.quota.consume(record.key_id, record.quota_per_minute)
+        now = time.time()
+        window = int(now // 60)
+        with self._quota_lock:
+            current, count = self._quota_windows.get(record.key_id, (window, 0))
+            if current != window:
+                count = 0
+            if count >= record.quota_per_minute:
+                return int(60 - now % 60) + 1
+            self._quota_windows[record.key_id] = (window, count + 1)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+_registry: Optional[KeyRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_key_registry() -> Optional[KeyRegistry]:
+    """
+    Process-wide registry, loaded on first use
+
+    Returns:
+        KeyRegistry, or None if API_KEY_REGISTRY_PATH is not configured
+    """
+    global _registry
+    if not settings.API_KEY_REGISTRY_PATH:
+        return None
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                quota = None
+                try:
+                    quota = SharedQuota(
+                        settings.API_KEY_QUOTA_PATH or default_quota_path(),
+                        capacity=settings.API_KEY_QUOTA_SLOTS
+                    )
+                except (OSError, ValueError) as e:
+                    logger.error(f"Shared quota table unavailable, quotas apply per worker: {str(e)}")
+                registry = KeyRegistry(
+                    settings.API_KEY_REGISTRY_PATH,
+                    pepper=settings.API_KEY_PEPPER,
+                    cache_size=settings.API_KEY_CACHE_SIZE,
+                    quota=quota
+                )
+                if settings.API_KEY_REGISTRY_RELOAD_SECONDS > 0:
+                    registry.start_watching(settings.API_KEY_REGISTRY_RELOAD_SECONDS)
+                _registry = registry
+    return _registry
+
+
+def close_key_registry() -> None:
+    """Stop the reload watcher and drop the process-wide registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.stop_watching()
+            if _registry.quota is not None:
+                _registry.quota.close()
+            _registry = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API key registry helpers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    hash_parser = commands.add_parser("hash", help="Print the stored digest of a key")
+    hash_parser.add_argument("api_key")
+
+    generate_parser = commands.add_parser("generate", help="Create a key and print its registry entry")
+    generate_parser.add_argument("--tenant", required=True)
+    generate_parser.add_argument("--quota", type=int, default=None, help="Requests per minute")
+    generate_parser.add_argument("--routes", default=None, help="Comma separated route paths")
+
+    args = parser.parse_args()
+    if args.command == "hash":
+        print(hash_key(args.api_key, settings.API_KEY_PEPPER))
+    else:
+        api_key = secrets.token_urlsafe(32)
+        entry = {
+            "key_id": secrets.token_hex(6),
+            "key_hash": hash_key(api_key, settings.API_KEY_PEPPER),
+            "tenant": args.tenant,
+            "quota_per_minute": args.quota,
+            "routes": args.routes.split(",") if args.routes else None,
+            "enabled": True,
+        }
+        print(f"API key (give to the client, it is not stored): {api_key}")
+        print(json.dumps(entry, indent=2))
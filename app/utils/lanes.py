@@ -0,0 +1,182 @@
+"""
+Bulkhead execution lanes
+
+Each route class gets its own bounded thread pool and queue, so a flood of
+one kind of work (e.g. large uploads) cannot starve the others or the event
+loop that serves /health.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException, status
+from app.config import settings
+from app.utils.logger import setup_logger
+from app.utils.profiler import current_route, thread_route
+
+logger = setup_logger(__name__)
+
+
+class ExecutionLane:
+    """
+    Dedicated thread pool with admission control and saturation metrics
+
+    At most ``workers`` jobs run at once and at most ``max_queue`` more may
+    wait; anything beyond that is rejected with 503 instead of queueing.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"lane-{name}")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled_queued = 0
+        self.abandoned_running = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """
+        Run a blocking callable on this lane
+
+        Raises:
+            HTTPException: 503 when the lane's queue is full
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                logger.warning(f"Lane '{self.name}' saturated, rejecting request")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Server busy ({self.name}), retry later",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+
+        call = functools.partial(func, *args, **kwargs)
+        route = current_route()
+        submitted = time.perf_counter()
+        state = {"started": False, "dropped": False}
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                if state["dropped"]:
+                    # Caller gave up before the job started; its slot is already released
+                    return None
+                state["started"] = True
+                self._active += 1
+                waited = started - submitted
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            ok = False
+            try:
+                with thread_route(route):
+                    result = call()
+                ok = True
+                return result
+            finally:
+                # The admission slot is held until the job itself finishes,
+                # even if its caller was cancelled meanwhile
+                with self._lock:
+                    self._active -= 1
+                    self._pending -= 1
+                    self._run_total += time.perf_counter() - started
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        except BaseException as e:
+            cancelled = isinstance(e, asyncio.CancelledError)
+            with self._lock:
+                if not state["started"]:
+                    # Queued jobs are dropped and release their slot now
+                    state["dropped"] = True
+                    self._pending -= 1
+                    if cancelled:
+                        self.cancelled_queued += 1
+                elif cancelled:
+                    # Running jobs finish but their result is discarded
+                    self.abandoned_running += 1
+            raise
+
+    def metrics(self) -> Dict:
+        """Saturation and latency counters for this lane"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": max(self._pending - self._active, 0),
+                "saturation": round(self._pending / (self.workers + self.max_queue), 3),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "cancelled_queued": self.cancelled_queued,
+                "abandoned_running": self.abandoned_running,
+                "avg_wait_ms": round(self._wait_total / finished * 1000, 2) if finished else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "avg_run_ms": round(self._run_total / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_lanes: Dict[str, ExecutionLane] = {}
+_lanes_lock = threading.Lock()
+
+
+def _lane_config(name: str) -> Optional[tuple]:
+    return {
+        "upload": (settings.UPLOAD_LANE_WORKERS, settings.UPLOAD_LANE_QUEUE),
+        "analysis": (settings.ANALYSIS_LANE_WORKERS, settings.ANALYSIS_LANE_QUEUE),
+        "export": (settings.EXPORT_LANE_WORKERS, settings.EXPORT_LANE_QUEUE),
+    }.get(name)
+
+
+def get_lane(name: str) -> ExecutionLane:
+    """
+    Lane for a route class, created on first use
+
+    Args:
+        name: "upload", "analysis" or "export"
+    """
+    lane = _lanes.get(name)
+    if lane is None:
+        with _lanes_lock:
+            lane = _lanes.get(name)
+            if lane is None:
+                config = _lane_config(name)
+                if config is None:
+                    raise KeyError(f"Unknown execution lane: {name}")
+                lane = ExecutionLane(name, *config)
+                _lanes[name] = lane
+    return lane
+
+
+def lane_metrics() -> Dict[str, Dict]:
+    """Metrics for every lane that has been used"""
+    return {name: lane.metrics() for name, lane in list(_lanes.items())}
+
+
+def shutdown_lanes() -> None:
+    """Stop all lane thread pools"""
+    with _lanes_lock:
+        for lane in _lanes.values():
+            lane.shutdown()
+        _lanes.clear()
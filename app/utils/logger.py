@@ -8,6 +8,14 @@ import os
 from pathlib import Path
 
 
+class _LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that creates its directory and file on first write"""
+    
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
 def setup_logger(name: str) -> logging.Logger:
     """
     Setup logger with both console and file handlers
@@ -21,9 +29,8 @@ def setup_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     
     if not logger.handlers:
-        # Create logs directory
+        # Logs directory is created on the first write
         log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
         
         # Set log level
         logger.setLevel(logging.INFO)
@@ -33,10 +40,11 @@ def setup_logger(name: str) -> logging.Logger:
         console_handler.setLevel(logging.INFO)
         
         # File handler
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = _LazyRotatingFileHandler(
             log_dir / "app.log",
             maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=5
+            backupCount=5,
+            delay=True
         )
         file_handler.setLevel(logging.DEBUG)
         
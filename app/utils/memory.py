@@ -0,0 +1,247 @@
+"""
+Memory instrumentation: tracemalloc snapshots, per-route peaks and upload gauges
+"""
+
+import os
+import threading
+import tracemalloc
+from typing import Dict, List, Optional, Set
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class Gauge:
+    """Thread-safe level with a high-water mark"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.value = 0
+        self.high_water = 0
+
+    def add(self, amount: int) -> None:
+        with self._lock:
+            self.value += amount
+            self.high_water = max(self.high_water, self.value)
+
+    def sub(self, amount: int) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self) -> Dict:
+        return {"current": self.value, "high_water": self.high_water}
+
+
+# Bytes held by upload handlers after `await file.read()`
+upload_in_flight_bytes = Gauge("upload_in_flight_bytes")
+# Multipart spool files still in memory / rolled over to disk
+upload_spooled_memory_bytes = Gauge("upload_spooled_memory_bytes")
+upload_spooled_disk_bytes = Gauge("upload_spooled_disk_bytes")
+
+GAUGES = (upload_in_flight_bytes, upload_spooled_memory_bytes, upload_spooled_disk_bytes)
+
+
+def spool_gauge_for(spool) -> Gauge:
+    """Gauge matching where a SpooledTemporaryFile currently keeps its data"""
+    if getattr(spool, "_rolled", False):
+        return upload_spooled_disk_bytes
+    return upload_spooled_memory_bytes
+
+
+class RoutePeaks:
+    """Peak traced allocation per route while tracemalloc is tracing"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def _entry(self, route: str) -> Dict:
+        return self._routes.setdefault(
+            route, {"requests": 0, "max_peak_bytes": 0, "total_peak_bytes": 0, "skipped_overlapping": 0}
+        )
+
+    def record(self, route: str, peak_bytes: int) -> None:
+        with self._lock:
+            entry = self._entry(route)
+            entry["requests"] += 1
+            entry["max_peak_bytes"] = max(entry["max_peak_bytes"], peak_bytes)
+            entry["total_peak_bytes"] += peak_bytes
+
+    def skip(self, route: str) -> None:
+        """Count a request whose peak was not measurable because others overlapped it"""
+        with self._lock:
+            self._entry(route)["skipped_overlapping"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                route: {
+                    "requests": entry["requests"],
+                    "max_peak_bytes": entry["max_peak_bytes"],
+                    "avg_peak_bytes": entry["total_peak_bytes"] // entry["requests"] if entry["requests"] else None,
+                    "skipped_overlapping": entry["skipped_overlapping"],
+                }
+                for route, entry in self._routes.items()
+            }
+
+
+route_peaks = RoutePeaks()
+
+# Long-lived streams: tracing them would mark every other request as overlapping
+UNTRACED_PATHS = frozenset({"/api/events", "/api/ws", "/api/admin/profile"})
+
+
+class _TracedRequest:
+    __slots__ = ("overlapped",)
+
+    def __init__(self):
+        self.overlapped = False
+
+
+class RouteMemoryMiddleware:
+    """
+    ASGI middleware recording each route's peak traced allocation
+
+    Costs a single is_tracing() check per request unless tracing is on.
+    tracemalloc has one process-wide peak, so a peak is only recorded for a
+    request that ran alone: a request overlapping another would both reset
+    that request's peak and add its own allocations to it. Overlapping
+    requests are counted per route as ``skipped_overlapping`` instead.
+    Requests to ``untraced_paths`` (streaming endpoints) are not tracked.
+    """
+
+    def __init__(self, app, untraced_paths=UNTRACED_PATHS):
+        self.app = app
+        self.untraced_paths = frozenset(untraced_paths)
+        # Traced requests in flight; only touched on the event loop thread
+        self._in_flight: Set[_TracedRequest] = set()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not tracemalloc.is_tracing()
+            or scope.get("path") in self.untraced_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        current = _TracedRequest()
+        if self._in_flight:
+            current.overlapped = True
+            for other in self._in_flight:
+                other.overlapped = True
+        else:
+            # Only reset the peak when no other traced request depends on it
+            tracemalloc.reset_peak()
+        self._in_flight.add(current)
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._in_flight.discard(current)
+            if tracemalloc.is_tracing():
+                route = scope.get("route")
+                path = getattr(route, "path", None) or scope.get("path", "")
+                if current.overlapped:
+                    route_peaks.skip(path)
+                else:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    route_peaks.record(path, max(peak - baseline, 0))
+
+
+class SnapshotStore:
+    """Holds the baseline tracemalloc snapshot for diffs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @staticmethod
+    def _filter(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def take(self, top: int = 20, frames: int = 1, key_type: str = "lineno") -> List[Dict]:
+        """
+        Start tracing if needed and store a new baseline snapshot
+
+        Returns:
+            Largest allocation sites in the new snapshot
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"tracemalloc started ({frames} frame(s))")
+        snapshot = self._filter(tracemalloc.take_snapshot())
+        with self._lock:
+            self.baseline = snapshot
+        return [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(key_type)[:top]
+        ]
+
+    def diff(self, top: int = 20, key_type: str = "lineno") -> Optional[List[Dict]]:
+        """
+        Compare the current heap against the baseline
+
+        Returns:
+            Largest growth sites, or None if no baseline was taken
+        """
+        with self._lock:
+            baseline = self.baseline
+        if baseline is None or not tracemalloc.is_tracing():
+            return None
+        current = self._filter(tracemalloc.take_snapshot())
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in current.compare_to(baseline, key_type)[:top]
+        ]
+
+    def stop(self) -> None:
+        """Stop tracing and drop the baseline"""
+        with self._lock:
+            self.baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("tracemalloc stopped")
+        route_peaks.clear()
+
+
+snapshots = SnapshotStore()
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux), or None if unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def memory_report() -> Dict:
+    """Gauges, per-route peaks and tracing state"""
+    tracing = tracemalloc.is_tracing()
+    traced = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    return {
+        "rss_bytes": rss_bytes(),
+        "tracing": tracing,
+        "traced_current_bytes": traced[0],
+        "traced_peak_bytes": traced[1],
+        "gauges": {gauge.name: gauge.snapshot() for gauge in GAUGES},
+        "route_peaks": route_peaks.snapshot(),
+    }
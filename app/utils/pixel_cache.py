@@ -0,0 +1,282 @@
+"""
+Decoded pixel cache backed by memory-mapped raw arrays
+
+The first analysis of an image decodes it once into a normalized,
+downscaled RGB array stored as a raw file. Later analyses, with any engine,
+map that file instead of decoding the JPEG/PNG again.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import uuid
+from contextlib import contextmanager, suppress
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.utils.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process only, guarded by the thread lock
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+MAGIC = b"PIX1"
+HEADER = struct.Struct("<4sIIH2x")  # magic, width, height, channels
+FILE_SUFFIX = ".pix"
+USAGE_FILE = "usage"
+LOCK_FILE = ".lock"
+
+
+class DecodedImage:
+    """
+    Read-only view of a cached pixel array
+
+    ``pixels`` is a memoryview straight over the mapped file, laid out as
+    height x width x channels uint8 values.
+    """
+
+    def __init__(self, image_id: str, path: str):
+        self.image_id = image_id
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.channels = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a pixel cache file: {path}")
+        self.pixels = memoryview(self._map)[HEADER.size:]
+
+    @property
+    def nbytes(self) -> int:
+        return self.width * self.height * self.channels
+
+    def to_numpy(self):
+        """Zero-copy numpy view (requires numpy)"""
+        import numpy as np
+
+        return np.frombuffer(self.pixels, dtype=np.uint8).reshape(
+            self.height, self.width, self.channels
+        )
+
+    def to_pil(self):
+        """Pillow image sharing the mapped buffer"""
+        from PIL import Image
+
+        mode = "RGB" if self.channels == 3 else "L"
+        return Image.frombuffer(mode, (self.width, self.height), self.pixels, "raw", mode, 0, 1)
+
+    def close(self) -> None:
+        """Release the mapping once no views remain"""
+        try:
+            self.pixels.release()
+            self._map.close()
+        except BufferError:
+            # Still exported (e.g. a numpy view); the mapping is freed with it
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PixelCache:
+    """
+    Size-bounded directory of decoded images with LRU eviction by bytes
+
+    The limit applies to the whole directory, which every worker process on
+    the host shares. The bytes in use are kept in a small usage file updated
+    under an flock. A hit bumps the file's mtime, so eviction removes the
+    least recently used files whichever process wrote or read them.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_dimension: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_dimension = max_dimension
+        self._lock = threading.Lock()
+        self._usage_path = os.path.join(cache_dir, USAGE_FILE)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._host_lock():
+            if not os.path.exists(self._usage_path):
+                self._write_usage(*self._scan_usage())
+
+    def _path(self, image_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{image_id}{FILE_SUFFIX}")
+
+    @contextmanager
+    def _host_lock(self):
+        """Serialize writers across threads and worker processes"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.cache_dir, LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _cache_files(self) -> List[Tuple[float, str, int]]:
+        """(mtime, path, size) of every cached array"""
+        found = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(FILE_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    found.append((stat.st_mtime, entry.path, stat.st_size))
+        return found
+
+    def _scan_usage(self) -> Tuple[int, int]:
+        files = self._cache_files()
+        return sum(size for _, _, size in files), len(files)
+
+    def _read_usage(self) -> Tuple[int, int]:
+        try:
+            with open(self._usage_path, "r") as f:
+                total_bytes, files = f.read().split()
+            return int(total_bytes), int(files)
+        except (OSError, ValueError):
+            return self._scan_usage()
+
+    def _write_usage(self, total_bytes: int, files: int) -> None:
+        tmp_path = f"{self._usage_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(f"{total_bytes} {files}")
+        os.replace(tmp_path, self._usage_path)
+
+    def _decode(self, image_path: str, target: str) -> str:
+        """Decode, normalize and write the raw array; returns the temp file"""
+        from PIL import Image, ImageOps
+
+        with Image.open(image_path) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((self.max_dimension, self.max_dimension))
+            data = img.tobytes()
+            header = HEADER.pack(MAGIC, img.width, img.height, 3)
+
+        tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(data)
+        return tmp_path
+
+    def _store(self, tmp_path: str, target: str) -> int:
+        """Move a decoded array into place and evict down to max_bytes (host lock held)"""
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(target)
+        except FileNotFoundError:
+            replaced = None
+        os.replace(tmp_path, target)
+
+        total_bytes, files = self._read_usage()
+        total_bytes += size - (replaced or 0)
+        files += 0 if replaced is not None else 1
+
+        if total_bytes > self.max_bytes:
+            # Rescan: the directory is the source of truth, and this also
+            # corrects drift left by a crashed worker
+            total_bytes, files = 0, 0
+            found = sorted(self._cache_files())
+            for _, path, file_size in found:
+                total_bytes += file_size
+                files += 1
+            for _, path, file_size in found:
+                if total_bytes <= self.max_bytes or files <= 1:
+                    break
+                if path == target:
+                    continue
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+                total_bytes -= file_size
+                files -= 1
+                self.evictions += 1
+
+        self._write_usage(total_bytes, files)
+        return size
+
+    def load(self, image_id: str, image_path: str) -> DecodedImage:
+        """
+        Map the decoded pixels of an image, decoding it on first use
+
+        Args:
+            image_id: Image ID
+            image_path: Path of the stored JPEG/PNG
+
+        Returns:
+            DecodedImage mapped from the cache file
+        """
+        path = self._path(image_id)
+        try:
+            # Bump the mtime so eviction in any worker sees this as recently used
+            os.utime(path)
+            image = DecodedImage(image_id, path)
+        except FileNotFoundError:
+            pass
+        else:
+            with self._lock:
+                self.hits += 1
+            return image
+
+        with self._lock:
+            self.misses += 1
+        tmp_path = self._decode(image_path, path)
+        try:
+            with self._host_lock():
+                size = self._store(tmp_path, path)
+                image = DecodedImage(image_id, path)
+        finally:
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+        logger.info(f"Decoded pixels cached for {image_id} ({size} bytes)")
+        return image
+
+    def stats(self) -> Dict:
+        """Host-wide occupancy and this process's hit counters"""
+        total_bytes, files = self._read_usage()
+        with self._lock:
+            return {
+                "entries": files,
+                "bytes": total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[PixelCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pixel_cache() -> Optional[PixelCache]:
+    """
+    Process-wide pixel cache
+
+    Returns:
+        PixelCache, or None if disabled
+    """
+    global _cache
+    if not settings.PIXEL_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PixelCache(
+                    settings.PIXEL_CACHE_DIR or os.path.join(settings.UPLOAD_DIR, "decoded"),
+                    max_bytes=settings.PIXEL_CACHE_MAX_BYTES,
+                    max_dimension=settings.PIXEL_CACHE_MAX_DIMENSION
+                )
+    return _cache
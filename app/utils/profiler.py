@@ -0,0 +1,209 @@
+"""
+On-demand sampling profiler
+
+A background thread snapshots the stacks of every thread (including the
+event loop thread) with sys._current_frames() at a fixed interval. Nothing
+runs between profiles, so the idle overhead is zero.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import CodeType
+from typing import Dict, List, Optional, Tuple
+
+NO_ROUTE = "-"
+MAX_OVERHEAD = 0.02  # Fraction of wall time the sampler may spend holding the GIL
+
+# ASGI scope of the request being handled; routing fills in scope["route"]
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+# Route served by each worker thread that is running a job for a request
+_thread_routes: Dict[int, str] = {}
+
+
+class RouteContextMiddleware:
+    """
+    ASGI middleware making the current request's route visible to worker threads
+
+    Endpoints hand heavy work to lane threads whose stacks do not contain
+    the endpoint function, so the route is carried with the job instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+def current_route() -> Optional[str]:
+    """Route path of the request handled in this context, if any"""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    return getattr(scope.get("route"), "path", None) or scope.get("path")
+
+
+@contextmanager
+def thread_route(route: Optional[str]):
+    """Attribute samples of the current thread to ``route`` while in the block"""
+    if route is None:
+        yield
+        return
+    ident = threading.get_ident()
+    _thread_routes[ident] = route
+    try:
+        yield
+    finally:
+        _thread_routes.pop(ident, None)
+
+
+class StackSampler:
+    """
+    Samples all thread stacks for a fixed duration
+
+    Each sample is tagged with the route a worker thread is running a job
+    for, or else the route whose endpoint function appears on the stack, so
+    time can be attributed to upload_image, analyze_image, etc.
+    """
+
+    def __init__(self, route_codes: Dict[CodeType, str], interval: float = 0.01, max_depth: int = 128):
+        self.route_codes = route_codes
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.overhead_seconds = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        names: Dict[int, str] = {}
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            tick = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if ident not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                self._record(ident, names.get(ident, str(ident)), frame)
+            self.sample_count += 1
+            spent = time.perf_counter() - tick
+            self.overhead_seconds += spent
+            # Stretch the interval if needed to keep the sampler under MAX_OVERHEAD
+            self._stop.wait(max(self.interval - spent, spent * (1 / MAX_OVERHEAD - 1)))
+        self.duration = time.perf_counter() - started
+
+    def _record(self, ident: int, thread_name: str, frame) -> None:
+        # Only code objects are kept while sampling; names are resolved on output
+        stack: List[CodeType] = []
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+            depth += 1
+        route = _thread_routes.get(ident)
+        if route is None:
+            route = NO_ROUTE
+            route_codes = self.route_codes
+            for code in stack:
+                if code in route_codes:
+                    route = route_codes[code]
+                    break
+        stack.reverse()
+        self.samples[(thread_name, route, tuple(stack))] += 1
+
+
+def _frame_label(code: CodeType) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+def to_collapsed(sampler: StackSampler) -> str:
+    """
+    Brendan Gregg collapsed-stack format
+
+    One line per unique stack: ``route;thread;outer;...;inner count``
+    """
+    lines = []
+    for (thread_name, route, stack), count in sampler.samples.most_common():
+        frames = ";".join(_frame_label(frame).replace(";", ",") for frame in stack)
+        lines.append(f"{route};{thread_name};{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(sampler: StackSampler, name: str = "image-analysis-api") -> Dict:
+    """
+    speedscope file format, one sampled profile per route
+
+    See https://www.speedscope.app/file-format-schema.json
+    """
+    frame_index: Dict[Tuple[str, str], int] = {}
+    frames = []
+    profiles: Dict[str, Dict] = {}
+    # Effective interval, which may exceed the requested one under load
+    weight = sampler.duration / sampler.sample_count * 1000 if sampler.sample_count else 0
+
+    for (thread_name, route, stack), count in sampler.samples.items():
+        indexes = []
+        for key in ((f"[{thread_name}]", ""),) + tuple((code.co_name, code.co_filename) for code in stack):
+            if key not in frame_index:
+                frame_index[key] = len(frames)
+                frames.append({"name": key[0], "file": key[1]} if key[1] else {"name": key[0]})
+            indexes.append(frame_index[key])
+
+        profile = profiles.setdefault(route, {
+            "type": "sampled",
+            "name": f"route {route}",
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": 0,
+            "samples": [],
+            "weights": [],
+        })
+        profile["samples"].append(indexes)
+        profile["weights"].append(count * weight)
+        profile["endValue"] += count * weight
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "image-analysis-api sampler",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": list(profiles.values()),
+    }
+
+
+def route_code_map(routes) -> Dict[CodeType, str]:
+    """Map each endpoint function's code object to its route path"""
+    codes = {}
+    for route in routes:
+        endpoint = getattr(route, "endpoint", None)
+        code = getattr(endpoint, "__code__", None)
+        if code is not None:
+            codes[code] = getattr(route, "path", endpoint.__name__)
+    return codes
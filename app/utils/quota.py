@@ -0,0 +1,145 @@
+"""
+Per-key request quotas shared by all workers on a host
+
+Counters live in a small memory-mapped table (in /dev/shm when available)
+with one fixed-size slot per key holding its current minute window and
+count. Every update takes an flock on the backing file, so N workers
+together admit at most the key's quota per minute rather than N times it.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from app.utils.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process only, guarded by the thread lock
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+MAGIC = b"IAQT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")  # magic, version, slot size, capacity
+HEADER_SIZE = 64
+
+SLOT = struct.Struct("<16sqI4x")  # key digest, minute window, count
+PROBE_LIMIT = 16
+
+
+def default_quota_path() -> str:
+    """Backing file location, preferring the RAM-backed /dev/shm"""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "image-analysis-quota")
+
+
+class SharedQuota:
+    """
+    Fixed-layout table of per-minute request counters in a memory-mapped file
+
+    Keys probe at most PROBE_LIMIT consecutive slots. A slot whose window
+    is not the current minute is free, so the table only has to hold the
+    keys used within one minute. When no slot is free the request is
+    allowed and counted in ``overflows``.
+    """
+
+    def __init__(self, path: str, capacity: int = 16384):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+            capacity = self._init_file(capacity)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        self.capacity = capacity
+        self._map = mmap.mmap(self._fd, HEADER_SIZE + capacity * SLOT.size)
+        self.rejected = 0
+        self.overflows = 0
+        logger.info(f"Shared quota table mapped at {path} ({capacity} slots)")
+
+    def _init_file(self, capacity: int) -> int:
+        """Validate an existing table or lay out a new one; returns its capacity"""
+        with self._locked():
+            size = os.fstat(self._fd).st_size
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            header = os.read(self._fd, HEADER.size) if size >= HEADER_SIZE else b""
+            if header[:4] == MAGIC:
+                _, version, slot_size, file_capacity = HEADER.unpack(header)
+                if version != VERSION or slot_size != SLOT.size:
+                    raise ValueError(f"Incompatible quota file: {self.path}")
+                return file_capacity
+            os.ftruncate(self._fd, HEADER_SIZE + capacity * SLOT.size)
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, HEADER.pack(MAGIC, VERSION, SLOT.size, capacity))
+            return capacity
+
+    def close(self) -> None:
+        """Unmap the table; the backing file is left for other workers"""
+        self._map.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _locked(self):
+        """Serialize updates across threads and processes"""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def consume(self, key_id: str, limit: int, now: Optional[float] = None) -> Optional[int]:
+        """
+        Count one request against a key's per-minute limit
+
+        Returns:
+            None if allowed, otherwise seconds until the window resets
+        """
+        now = now or time.time()
+        window = int(now // 60)
+        digest = hashlib.blake2b(key_id.encode(), digest_size=16).digest()
+        start = int.from_bytes(digest[:8], "little") % self.capacity
+
+        with self._locked():
+            free = None
+            for i in range(min(PROBE_LIMIT, self.capacity)):
+                offset = HEADER_SIZE + ((start + i) % self.capacity) * SLOT.size
+                slot_key, slot_window, count = SLOT.unpack_from(self._map, offset)
+                if slot_key == digest:
+                    if slot_window != window:
+                        count = 0
+                    if count >= limit:
+                        self.rejected += 1
+                        return int(60 - now % 60) + 1
+                    SLOT.pack_into(self._map, offset, digest, window, count + 1)
+                    return None
+                if free is None and slot_window != window:
+                    # Never used, or its key has made no request this minute
+                    free = offset
+            if free is None:
+                self.overflows += 1
+                logger.warning(f"Quota table {self.path} full, allowing request for key {key_id}")
+                return None
+            SLOT.pack_into(self._map, free, digest, window, 1)
+        return None
+
+    def stats(self) -> Dict:
+        """Per-worker counters and table geometry"""
+        return {
+            "path": self.path,
+            "capacity": self.capacity,
+            "rejected": self.rejected,
+            "overflows": self.overflows,
+        }
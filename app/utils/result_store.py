@@ -0,0 +1,337 @@
+"""
+Persistent store of uploaded images and their latest analysis results
+
+One SQLite database (WAL mode) shared by every worker process. Uploads and
+analyses are recorded as they happen; exports read it in keyset-paginated
+batches so they never hold more than one batch in memory and never block
+writers.
+
+Usage:
+    python -m app.utils.result_store export [--format ndjson|csv] [--cursor N] [--since ISO] [--until ISO] [-o FILE]
+    python -m app.utils.result_store reindex
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+CSV_COLUMNS = [
+    "cursor", "image_id", "filename", "size", "stored_ext", "stored_size",
+    "uploaded_at", "skin_type", "detected_issues", "confidence", "analyzed_at",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    image_id TEXT NOT NULL UNIQUE,
+    filename TEXT,
+    size INTEGER,
+    stored_ext TEXT,
+    stored_size INTEGER,
+    uploaded_at REAL NOT NULL,
+    skin_type TEXT,
+    detected_issues TEXT,
+    confidence REAL,
+    analyzed_at REAL
+);
+CREATE INDEX IF NOT EXISTS images_uploaded_at ON images (uploaded_at);
+"""
+
+_SELECT = (
+    "SELECT seq, image_id, filename, size, stored_ext, stored_size, uploaded_at, "
+    "skin_type, detected_issues, confidence, analyzed_at FROM images"
+)
+
+_IMAGE_FILE = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\.(\w+)$")
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    """Epoch seconds for a datetime; naive values are taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class ResultStore:
+    """
+    SQLite-backed table of images, one row per image
+
+    Each thread gets its own connection. ``seq`` increases with every new
+    image and is the export cursor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self._connection()
+        created = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images'"
+        ).fetchone() is None
+        connection.executescript(_SCHEMA)
+        if created:
+            # Images uploaded before the store existed
+            self.reindex()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def record_upload(
+        self,
+        image_id: str,
+        filename: str,
+        size: int,
+        stored_ext: str,
+        stored_size: int,
+        uploaded_at: Optional[float] = None
+    ) -> None:
+        """Add a newly stored image (failures are logged, not raised)"""
+        try:
+            self._connection().execute(
+                "INSERT OR IGNORE INTO images (image_id, filename, size, stored_ext, stored_size, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (image_id, filename, size, stored_ext, stored_size, uploaded_at or time.time())
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record upload {image_id}: {str(e)}")
+
+    def record_analysis(self, result: Dict, analyzed_at: Optional[float] = None) -> None:
+        """
+        Store the latest analysis of an image
+
+        Images the store has not seen (e.g. uploaded by an older build) get
+        a row with only the analysis filled in. Failures are logged, not
+        raised.
+        """
+        analyzed_at = analyzed_at or time.time()
+        try:
+            self._connection().execute(
+                "INSERT INTO images (image_id, uploaded_at, skin_type, detected_issues, confidence, analyzed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (image_id) DO UPDATE SET skin_type = excluded.skin_type, "
+                "detected_issues = excluded.detected_issues, confidence = excluded.confidence, "
+                "analyzed_at = excluded.analyzed_at",
+                (
+                    result["image_id"], analyzed_at, result["skin_type"],
+                    json.dumps(result["detected_issues"]), result["confidence"], analyzed_at,
+                )
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record analysis {result['image_id']}: {str(e)}")
+
+    def reindex(self, upload_dir: Optional[str] = None) -> int:
+        """
+        Add stored images that have no row yet
+
+        Returns:
+            Number of images added
+        """
+        upload_dir = upload_dir or settings.UPLOAD_DIR
+        if not os.path.isdir(upload_dir):
+            return 0
+        rows = []
+        with os.scandir(upload_dir) as entries:
+            for entry in entries:
+                match = _IMAGE_FILE.match(entry.name)
+                if match is None or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                ext = match.group(2).lower()
+                rows.append((match.group(1), entry.name, stat.st_size, ext, stat.st_size, stat.st_mtime))
+        rows.sort(key=lambda row: row[5])
+
+        connection = self._connection()
+        before = connection.total_changes
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO images (image_id, filename, size, stored_ext, stored_size, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        added = connection.total_changes - before
+        if added:
+            logger.info(f"Indexed {added} existing image(s) from {upload_dir}")
+        return added
+
+    def fetch(
+        self,
+        after: int = 0,
+        limit: int = 5000,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> List[tuple]:
+        """Rows with seq > after, in seq order, optionally within [since, until)"""
+        query = _SELECT + " WHERE seq > ?"
+        params: list = [after]
+        if since is not None:
+            query += " AND uploaded_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND uploaded_at < ?"
+            params.append(until)
+        query += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        return self._connection().execute(query, params).fetchall()
+
+    def export_batch(
+        self,
+        format: str,
+        after: int = 0,
+        limit: int = 5000,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> Tuple[bytes, int, int]:
+        """
+        Read and encode one batch of rows
+
+        Returns:
+            (encoded rows, cursor of the last row, number of rows)
+        """
+        rows = self.fetch(after, limit, since, until)
+        if not rows:
+            return b"", after, 0
+        return encode_rows(rows, format), rows[-1][0], len(rows)
+
+    def iter_export(
+        self,
+        format: str,
+        after: int = 0,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        batch_size: int = 5000
+    ) -> Iterator[bytes]:
+        """Encoded export, one chunk per batch (CSV header first)"""
+        if format == "csv":
+            yield csv_header()
+        while True:
+            chunk, after, count = self.export_batch(format, after, batch_size, since, until)
+            if count:
+                yield chunk
+            if count < batch_size:
+                return
+
+
+def csv_header() -> bytes:
+    return (",".join(CSV_COLUMNS) + "\r\n").encode()
+
+
+def encode_rows(rows: List[tuple], format: str) -> bytes:
+    """Encode rows as NDJSON lines or CSV records"""
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            issues = json.loads(row[8]) if row[8] else []
+            writer.writerow(row[:6] + (_isoformat(row[6]), row[7], ";".join(issues), row[9], _isoformat(row[10])))
+        return buffer.getvalue().encode()
+
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({
+            "cursor": row[0],
+            "image_id": row[1],
+            "filename": row[2],
+            "size": row[3],
+            "stored_ext": row[4],
+            "stored_size": row[5],
+            "uploaded_at": _isoformat(row[6]),
+            "skin_type": row[7],
+            "detected_issues": json.loads(row[8]) if row[8] else None,
+            "confidence": row[9],
+            "analyzed_at": _isoformat(row[10]),
+        }))
+    lines.append("")
+    return "\n".join(lines).encode()
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """
+    Process-wide result store, opened on first use
+
+    Returns:
+        ResultStore, or None if RESULT_STORE_ENABLED is off
+    """
+    global _store
+    if not settings.RESULT_STORE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore(
+                    settings.RESULT_STORE_PATH or os.path.join(settings.UPLOAD_DIR, "results.db")
+                )
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Result store helpers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write stored images and results")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    export_parser.add_argument("--cursor", type=int, default=0, help="Resume after this cursor")
+    export_parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                               help="Uploaded at or after (ISO 8601, UTC if no offset)")
+    export_parser.add_argument("--until", type=datetime.fromisoformat, default=None,
+                               help="Uploaded before (ISO 8601, UTC if no offset)")
+    export_parser.add_argument("-o", "--output", default=None, help="Output file (default stdout)")
+
+    commands.add_parser("reindex", help="Add stored images that are missing from the store")
+
+    args = parser.parse_args()
+    store = ResultStore(settings.RESULT_STORE_PATH or os.path.join(settings.UPLOAD_DIR, "results.db"))
+    if args.command == "reindex":
+        print(f"Added {store.reindex()} image(s)")
+    else:
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for chunk in store.iter_export(
+                args.format,
+                after=args.cursor,
+                since=to_timestamp(args.since),
+                until=to_timestamp(args.until),
+                batch_size=settings.EXPORT_BATCH_SIZE
+            ):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
@@ -0,0 +1,315 @@
+"""
+Cross-worker shared-memory cache for image metadata and analysis results
+
+All uvicorn workers on a host map the same file (in /dev/shm when available)
+holding a fixed-capacity, open-addressing hash table of fixed-size slots.
+Reads are lock-free and use a per-slot sequence counter (seqlock) to detect
+torn records; writers serialize on an flock of the backing file.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from app.config import settings
+from app.utils.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process only, guarded by the thread lock
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+MAGIC = b"IASC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")  # magic, version, reserved, slot size, capacity
+HEADER_SIZE = 64
+
+SLOT_SIZE = 128
+SLOT_SEQ = struct.Struct("<I")
+SLOT_BODY = struct.Struct("<B3x16sdH")  # kind, key digest, stored_at, value length
+SLOT_HEADER_SIZE = SLOT_SEQ.size + SLOT_BODY.size
+MAX_VALUE_SIZE = SLOT_SIZE - SLOT_HEADER_SIZE
+PROBE_LIMIT = 8
+
+# Record kinds
+KIND_EMPTY = 0
+KIND_IMAGE = 1
+KIND_ANALYSIS = 2
+KIND_DELETED = 255  # Tombstone: reusable, but lookups keep probing past it
+
+# Compact record formats
+IMAGE_RECORD = struct.Struct("<4sQ")  # extension, file size
+ANALYSIS_PACKED = struct.Struct("<BBHH")  # format, skin type index, issue bitmask, confidence * 10000
+FORMAT_PACKED = 0
+FORMAT_JSON = 1
+
+
+def default_cache_path() -> str:
+    """Backing file location, preferring the RAM-backed /dev/shm"""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "image-analysis-cache")
+
+
+class SharedCache:
+    """
+    Fixed-layout hash table in a memory-mapped file
+
+    Each key is reduced to a 16 byte BLAKE2b digest. Lookups probe at most
+    PROBE_LIMIT consecutive slots; when a write finds no free slot in that
+    window, the oldest record in the window is evicted. Deleted records
+    leave a tombstone so that keys stored further along the window stay
+    reachable.
+    """
+
+    def __init__(self, path: str, capacity: int = 65536):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+            capacity = self._init_file(capacity)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        self.capacity = capacity
+        self._map = mmap.mmap(self._fd, HEADER_SIZE + capacity * SLOT_SIZE)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        logger.info(f"Shared cache mapped at {path} ({capacity} slots)")
+
+    def _init_file(self, capacity: int) -> int:
+        """Validate an existing table or lay out a new one; returns its capacity"""
+        with self._write_lock():
+            size = os.fstat(self._fd).st_size
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            header = os.read(self._fd, HEADER.size) if size >= HEADER_SIZE else b""
+            if header[:4] == MAGIC:
+                _, version, _, slot_size, file_capacity = HEADER.unpack(header)
+                if version != VERSION or slot_size != SLOT_SIZE:
+                    raise ValueError(f"Incompatible shared cache file: {self.path}")
+                if file_capacity != capacity:
+                    logger.warning(
+                        f"Shared cache {self.path} has capacity {file_capacity}, ignoring requested {capacity}"
+                    )
+                return file_capacity
+            os.ftruncate(self._fd, HEADER_SIZE + capacity * SLOT_SIZE)
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, HEADER.pack(MAGIC, VERSION, 0, SLOT_SIZE, capacity))
+            return capacity
+
+    def close(self) -> None:
+        """Unmap the table; the backing file is left for other workers"""
+        self._map.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers across threads and processes"""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _digest(kind: int, key: str) -> bytes:
+        return hashlib.blake2b(f"{kind}:{key}".encode(), digest_size=16).digest()
+
+    def _probe(self, digest: bytes):
+        start = int.from_bytes(digest[:8], "little") % self.capacity
+        for i in range(min(PROBE_LIMIT, self.capacity)):
+            yield HEADER_SIZE + ((start + i) % self.capacity) * SLOT_SIZE
+
+    def _read_slot(self, offset: int):
+        """Consistent snapshot of a slot, retrying while a writer holds it"""
+        for _ in range(100):
+            seq = SLOT_SEQ.unpack_from(self._map, offset)[0]
+            if seq & 1:
+                continue
+            record = self._map[offset:offset + SLOT_SIZE]
+            if SLOT_SEQ.unpack_from(self._map, offset)[0] == seq:
+                return record
+        return None
+
+    def get(self, kind: int, key: str) -> Optional[bytes]:
+        """
+        Lock-free lookup
+
+        Returns:
+            Stored value bytes, or None on a miss
+        """
+        digest = self._digest(kind, key)
+        for offset in self._probe(digest):
+            record = self._read_slot(offset)
+            if record is None:
+                continue
+            slot_kind, slot_key, _, length = SLOT_BODY.unpack_from(record, SLOT_SEQ.size)
+            if slot_kind == KIND_EMPTY:
+                break
+            if slot_kind == kind and slot_key == digest:
+                self.hits += 1
+                return record[SLOT_HEADER_SIZE:SLOT_HEADER_SIZE + length]
+        self.misses += 1
+        return None
+
+    def put(self, kind: int, key: str, value: bytes) -> bool:
+        """
+        Insert or replace a record
+
+        Returns:
+            False if the value does not fit in a slot
+        """
+        if len(value) > MAX_VALUE_SIZE:
+            return False
+
+        digest = self._digest(kind, key)
+        with self._write_lock():
+            target = None
+            free = None
+            oldest = None
+            for offset in self._probe(digest):
+                slot_kind, slot_key, stored_at, _ = SLOT_BODY.unpack_from(self._map, offset + SLOT_SEQ.size)
+                if slot_kind == kind and slot_key == digest:
+                    target = offset
+                    break
+                if slot_kind in (KIND_EMPTY, KIND_DELETED):
+                    if free is None:
+                        free = offset
+                    if slot_kind == KIND_EMPTY:
+                        break
+                    continue
+                if oldest is None or stored_at < oldest[1]:
+                    oldest = (offset, stored_at)
+            if target is None:
+                target = free
+            if target is None:
+                target = oldest[0]
+                self.evictions += 1
+            self._write_slot(target, kind, digest, time.time(), value)
+        return True
+
+    def delete(self, kind: int, key: str) -> bool:
+        """
+        Remove a record
+
+        Returns:
+            True if a record was removed
+        """
+        digest = self._digest(kind, key)
+        with self._write_lock():
+            for offset in self._probe(digest):
+                slot_kind, slot_key, _, _ = SLOT_BODY.unpack_from(self._map, offset + SLOT_SEQ.size)
+                if slot_kind == KIND_EMPTY:
+                    break
+                if slot_kind == kind and slot_key == digest:
+                    self._write_slot(offset, KIND_DELETED, bytes(16), 0.0, b"")
+                    return True
+        return False
+
+    def _write_slot(self, offset: int, kind: int, digest: bytes, stored_at: float, value: bytes) -> None:
+        """Overwrite a slot; the caller holds the write lock"""
+        # Odd sequence number marks the slot as being written
+        seq = SLOT_SEQ.unpack_from(self._map, offset)[0]
+        SLOT_SEQ.pack_into(self._map, offset, (seq + 1) & 0xFFFFFFFF)
+        SLOT_BODY.pack_into(self._map, offset + SLOT_SEQ.size, kind, digest, stored_at, len(value))
+        self._map[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + len(value)] = value
+        SLOT_SEQ.pack_into(self._map, offset, (seq + 2) & 0xFFFFFFFF)
+
+    def stats(self) -> Dict:
+        """Per-worker hit/miss counters and table geometry"""
+        return {
+            "path": self.path,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def encode_image_record(ext: str, size: int) -> bytes:
+    """Pack image metadata (extension and size in bytes)"""
+    return IMAGE_RECORD.pack(ext.encode()[:4], size)
+
+
+def decode_image_record(value: bytes) -> Dict:
+    """Unpack image metadata"""
+    ext, size = IMAGE_RECORD.unpack(value)
+    return {"ext": ext.rstrip(b"\0").decode(), "size": size}
+
+
+def encode_analysis_record(result: Dict) -> bytes:
+    """
+    Pack an analysis result
+
+    Known skin types and issues become indexes into the analyzer's tables,
+    anything else falls back to JSON.
+    """
+    from app.utils.analysis import MockAnalyzer
+
+    try:
+        skin_index = MockAnalyzer.SKIN_TYPES.index(result["skin_type"])
+        mask = 0
+        for issue in result["detected_issues"]:
+            mask |= 1 << MockAnalyzer.POSSIBLE_ISSUES.index(issue)
+        return ANALYSIS_PACKED.pack(FORMAT_PACKED, skin_index, mask, round(result["confidence"] * 10000))
+    except (ValueError, struct.error):
+        payload = {k: result[k] for k in ("skin_type", "detected_issues", "confidence")}
+        return bytes([FORMAT_JSON]) + json.dumps(payload, separators=(",", ":")).encode()
+
+
+def decode_analysis_record(image_id: str, value: bytes) -> Dict:
+    """Unpack an analysis result"""
+    from app.utils.analysis import MockAnalyzer
+
+    if value[0] == FORMAT_JSON:
+        result = json.loads(value[1:])
+    else:
+        _, skin_index, mask, confidence = ANALYSIS_PACKED.unpack(value)
+        result = {
+            "skin_type": MockAnalyzer.SKIN_TYPES[skin_index],
+            "detected_issues": [
+                issue for i, issue in enumerate(MockAnalyzer.POSSIBLE_ISSUES) if mask & (1 << i)
+            ],
+            "confidence": confidence / 10000,
+        }
+    return {"image_id": image_id, **result}
+
+
+_cache: Optional[SharedCache] = None
+_cache_failed = False
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """
+    Process-wide cache handle
+
+    Returns:
+        SharedCache, or None if disabled or the backing file is unusable
+    """
+    global _cache, _cache_failed
+    if not settings.SHARED_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is None:
+        try:
+            _cache = SharedCache(
+                settings.SHARED_CACHE_PATH or default_cache_path(),
+                capacity=settings.SHARED_CACHE_SLOTS
+            )
+        except (OSError, ValueError) as e:
+            logger.error(f"Shared cache disabled: {str(e)}")
+            _cache_failed = True
+            return None
+    return _cache
@@ -0,0 +1,124 @@
+"""
+Startup-phase timing, background warm-up and import-time reporting
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase took
+
+    ``mark(name)`` closes the phase that started at the previous mark.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._last = self._started
+        self._lock = threading.Lock()
+        self.phases: List[Dict] = []
+
+    def mark(self, name: str) -> float:
+        """Record the time since the previous mark under ``name``"""
+        with self._lock:
+            now = time.perf_counter()
+            elapsed = (now - self._last) * 1000
+            self.phases.append({"phase": name, "ms": round(elapsed, 2)})
+            self._last = now
+            return elapsed
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        """Record a phase timed elsewhere (e.g. a background warm-up step)"""
+        with self._lock:
+            self.phases.append({"phase": name, "ms": round(elapsed_ms, 2)})
+
+    def total_ms(self) -> float:
+        """Time since this timer was created"""
+        return round((time.perf_counter() - self._started) * 1000, 2)
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {"total_ms": self.total_ms(), "phases": list(self.phases)}
+
+
+timer = StartupTimer()
+
+_warmed_up = threading.Event()
+
+
+def warm_up() -> None:
+    """
+    Load the dependencies deferred by lazy startup
+
+    Imports Pillow (with its JPEG/PNG/WebP plugins) and the analyzer so the
+    first upload or analysis does not pay for them.
+    """
+    if _warmed_up.is_set():
+        return
+
+    start = time.perf_counter()
+    from PIL import Image, ImageOps  # noqa: F401
+    Image.init()
+    timer.record("warmup:pillow", (time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    from app.utils.analysis import MockAnalyzer  # noqa: F401
+    timer.record("warmup:analyzer", (time.perf_counter() - start) * 1000)
+
+    _warmed_up.set()
+
+
+def start_background_warm_up() -> threading.Thread:
+    """Run warm_up() in a daemon thread"""
+    thread = threading.Thread(target=warm_up, name="startup-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_time_report(module: str = "app.main", top: int = 20) -> List[Dict]:
+    """
+    Cumulative import time per module, measured in a fresh interpreter
+
+    Args:
+        module: Module to import
+        top: Number of slowest modules to return
+
+    Returns:
+        List of {"module", "self_ms", "cumulative_ms"} sorted slowest first
+    """
+    import re
+    import subprocess
+    
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    pattern = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = pattern.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+            })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def print_startup_report(top: int = 20, lazy: Optional[bool] = None) -> None:
+    """Print the phase timings of this process and the slowest imports"""
+    report = timer.report()
+    mode = "" if lazy is None else (" (lazy)" if lazy else " (eager)")
+    print(f"Startup phases{mode}: {report['total_ms']} ms total")
+    for phase in report["phases"]:
+        print(f"   {phase['phase']:<24} {phase['ms']:>9.2f} ms")
+
+    print(f"\nSlowest imports (cumulative, fresh interpreter, top {top}):")
+    for row in import_time_report(top=top):
+        print(f"   {row['module']:<40} {row['cumulative_ms']:>9.2f} ms  (self {row['self_ms']:.2f} ms)")
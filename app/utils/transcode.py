@@ -0,0 +1,236 @@
+"""
+Ingest-time transcoding of uploads to a compact storage format
+"""
+
+import asyncio
+import os
+import shutil
+import threading
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Pillow format name and file extension per configured target
+TARGET_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+    "jpg": ("JPEG", "jpg"),
+}
+
+
+def transcode_image(src_path: str, dest_path: str, target: str, max_dimension: int, quality: int) -> int:
+    """
+    Normalize and re-encode an image (runs in a worker process)
+
+    EXIF orientation is applied to the pixels and all metadata is dropped.
+    If the source is gone once encoding finishes, the upload was abandoned
+    meanwhile and the output is removed here, since the request that would
+    have cleaned it up has already given up on it.
+
+    Args:
+        src_path: Validated source image
+        dest_path: Where to write the re-encoded image
+        target: Key of TARGET_FORMATS
+        max_dimension: Longest side after downscaling
+        quality: Encoder quality (1-100)
+
+    Returns:
+        Size of the written file in bytes
+    """
+    from PIL import Image, ImageOps
+
+    pil_format, _ = TARGET_FORMATS[target]
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_dimension, max_dimension))
+        if pil_format == "JPEG":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            has_alpha = "A" in img.getbands() or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        if pil_format == "JPEG":
+            img.save(dest_path, pil_format, quality=quality, optimize=True, progressive=True)
+        else:
+            img.save(dest_path, pil_format, quality=quality, method=4)
+    if not os.path.exists(src_path):
+        with suppress(FileNotFoundError):
+            os.remove(dest_path)
+        raise FileNotFoundError(f"Source removed while transcoding: {src_path}")
+    return os.path.getsize(dest_path)
+
+
+class TranscodeStats:
+    """Running totals of bytes received vs bytes stored"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = 0
+        self.failures = 0
+        self.original_bytes = 0
+        self.stored_bytes = 0
+
+    def record(self, original: int, stored: int) -> None:
+        with self._lock:
+            self.files += 1
+            self.original_bytes += original
+            self.stored_bytes += stored
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def report(self) -> Dict:
+        """Totals and bytes saved by this worker process since startup"""
+        saved = self.original_bytes - self.stored_bytes
+        return {
+            "pid": os.getpid(),
+            "files": self.files,
+            "failures": self.failures,
+            "original_bytes": self.original_bytes,
+            "stored_bytes": self.stored_bytes,
+            "bytes_saved": saved,
+            "ratio": round(self.stored_bytes / self.original_bytes, 3) if self.original_bytes else None,
+        }
+
+
+stats = TranscodeStats()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def check_transcode_settings() -> None:
+    """
+    Validate the transcoding configuration once, at startup
+
+    Raises:
+        ValueError: If TRANSCODE_FORMAT is not supported
+    """
+    if settings.TRANSCODE_FORMAT.lower() not in TARGET_FORMATS:
+        raise ValueError(
+            f"Unsupported TRANSCODE_FORMAT: {settings.TRANSCODE_FORMAT} "
+            f"(expected one of {', '.join(TARGET_FORMATS)})"
+        )
+
+
+def get_transcode_pool() -> ProcessPoolExecutor:
+    """Lazily started process pool shared by all uploads"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=settings.TRANSCODE_WORKERS)
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next upload starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_in_pool(func, *args):
+    """Run func in the process pool, replacing the pool and retrying once if it broke"""
+    loop = asyncio.get_running_loop()
+    pool = get_transcode_pool()
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # A worker process died (e.g. OOM-killed); the pool rejects all further work
+        logger.warning("Transcode process pool broken, starting a new one")
+        _discard_pool(pool)
+        return await loop.run_in_executor(get_transcode_pool(), func, *args)
+
+
+def shutdown_transcode_pool() -> None:
+    """Stop the worker processes, if started"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def original_path(file_path: str) -> str:
+    """Where TRANSCODE_KEEP_ORIGINAL moves the original of a stored upload"""
+    return os.path.join(settings.UPLOAD_DIR, "originals", os.path.basename(file_path))
+
+
+async def transcode_upload(image_id: str, file_path: str, file_ext: str) -> Tuple[str, str, int]:
+    """
+    Replace a validated upload with its transcoded version
+
+    The original is moved to UPLOAD_DIR/originals when TRANSCODE_KEEP_ORIGINAL
+    is set and deleted otherwise. If re-encoding fails or does not make the
+    file smaller the original is stored unchanged. If cancelled, both the
+    original and any partial output are removed.
+
+    Args:
+        image_id: ID of the upload
+        file_path: Path of the stored original
+        file_ext: Extension of the original
+
+    Returns:
+        Tuple of (stored path, stored extension, stored size)
+    """
+    # TRANSCODE_FORMAT is validated at startup by check_transcode_settings
+    target = settings.TRANSCODE_FORMAT.lower()
+    _, target_ext = TARGET_FORMATS[target]
+
+    original_size = os.path.getsize(file_path)
+    dest_path = os.path.join(settings.UPLOAD_DIR, f"{image_id}.{target_ext}")
+    tmp_path = f"{dest_path}.tmp"
+
+    try:
+        stored_size = await _run_in_pool(
+            transcode_image,
+            file_path,
+            tmp_path,
+            target,
+            settings.TRANSCODE_MAX_DIMENSION,
+            settings.TRANSCODE_QUALITY
+        )
+    except Exception as e:
+        # The original is already validated, so store it as received
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        stats.record_failure()
+        logger.error(f"Transcoding failed for {image_id}, keeping original: {str(e)}")
+        return file_path, file_ext, original_size
+    except BaseException:
+        # Cancelled: the upload is abandoned. The worker process may still be
+        # encoding, so remove the original first; a worker that finishes
+        # after this sees it gone and removes its own output.
+        with suppress(FileNotFoundError):
+            os.remove(file_path)
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+    if stored_size >= original_size:
+        os.remove(tmp_path)
+        stats.record(original_size, original_size)
+        logger.info(f"Kept original for {image_id}: transcoding saved nothing")
+        return file_path, file_ext, original_size
+
+    if settings.TRANSCODE_KEEP_ORIGINAL:
+        kept_path = original_path(file_path)
+        os.makedirs(os.path.dirname(kept_path), exist_ok=True)
+        shutil.move(file_path, kept_path)
+    elif file_path != dest_path:
+        os.remove(file_path)
+    os.replace(tmp_path, dest_path)
+
+    stats.record(original_size, stored_size)
+    logger.info(
+        f"Transcoded {image_id}: {original_size} -> {stored_size} bytes "
+        f"({stats.report()['bytes_saved']} bytes saved in total)"
+    )
+    return dest_path, target_ext, stored_size
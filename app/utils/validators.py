@@ -4,13 +4,17 @@ Validation utilities for file uploads and data
 
 import os
 from pathlib import Path
-from PIL import Image
+from typing import Optional
 from fastapi import HTTPException, status
 from app.config import settings
 from app.utils.logger import setup_logger
+from app.utils import shared_cache
 
 logger = setup_logger(__name__)
 
+# Extensions an image can be stored under (uploads plus transcoded formats)
+STORED_EXTENSIONS = ("jpg", "png", "webp")
+
 
 def validate_file_upload(filename: str, file_size: int) -> bool:
     """
@@ -59,6 +63,9 @@ def validate_image(file_path: str) -> bool:
     Raises:
         HTTPException if not a valid image
     """
+    # Imported here so Pillow is only loaded once an upload needs it
+    from PIL import Image
+    
     try:
         with Image.open(file_path) as img:
             img.verify()
@@ -72,6 +79,41 @@ def validate_image(file_path: str) -> bool:
         )
 
 
+def find_image_path(image_id: str) -> Optional[str]:
+    """
+    Locate a stored image
+    
+    Args:
+        image_id: Image ID to look up
+        
+    Returns:
+        Path to the image file, or None if it does not exist
+    """
+    cache = shared_cache.get_shared_cache()
+    if cache is not None:
+        record = cache.get(shared_cache.KIND_IMAGE, image_id)
+        if record is not None:
+            ext = shared_cache.decode_image_record(record)["ext"]
+            image_path = os.path.join(settings.UPLOAD_DIR, f"{image_id}.{ext}")
+            if os.path.exists(image_path):
+                return image_path
+            # The table outlives restarts; forget images removed from UPLOAD_DIR
+            cache.delete(shared_cache.KIND_IMAGE, image_id)
+            cache.delete(shared_cache.KIND_ANALYSIS, image_id)
+    
+    for ext in STORED_EXTENSIONS:
+        image_path = os.path.join(settings.UPLOAD_DIR, f"{image_id}.{ext}")
+        if os.path.exists(image_path):
+            if cache is not None:
+                cache.put(
+                    shared_cache.KIND_IMAGE,
+                    image_id,
+                    shared_cache.encode_image_record(ext, os.path.getsize(image_path))
+                )
+            return image_path
+    return None
+
+
 def image_exists(image_id: str) -> bool:
     """
     Check if image exists in storage
@@ -82,8 +124,4 @@ def image_exists(image_id: str) -> bool:
     Returns:
         True if image exists
     """
-    image_path = os.path.join(settings.UPLOAD_DIR, f"{image_id}.jpg")
-    exists = os.path.exists(image_path) or os.path.exists(
-        os.path.join(settings.UPLOAD_DIR, f"{image_id}.png")
-    )
-    return exists
+    return find_image_path(image_id) is not None
@@ -0,0 +1,105 @@
+"""
+Benchmark: bulk export throughput and its effect on concurrent writes
+Exports should stream tens of thousands of rows per second while uploads
+and analyses keep recording results at their usual latency.
+
+Environment:
+    BENCH_EXPORT_ROWS  rows in the store (default 200000)
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from app.utils.result_store import ResultStore
+
+ROWS = int(os.getenv("BENCH_EXPORT_ROWS", "200000"))
+
+
+def print_header(title):
+    """Print section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+
+def fill_store(store):
+    """Insert ROWS images, every other one analyzed"""
+    connection = store._connection()
+    now = time.time() - ROWS
+    connection.execute("BEGIN")
+    for i in range(ROWS):
+        image_id = str(uuid.uuid4())
+        if i % 2:
+            connection.execute(
+                "INSERT INTO images (image_id, filename, size, stored_ext, stored_size, uploaded_at, "
+                "skin_type, detected_issues, confidence, analyzed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (image_id, f"img{i}.jpg", 120000, "webp", 40000, now + i,
+                 "Oily", '["Acne", "Redness"]', 0.87, now + i + 1)
+            )
+        else:
+            connection.execute(
+                "INSERT INTO images (image_id, filename, size, stored_ext, stored_size, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (image_id, f"img{i}.jpg", 120000, "webp", 40000, now + i)
+            )
+    connection.execute("COMMIT")
+
+
+def export(store, format):
+    """Rows per second and output bytes for a full export"""
+    start = time.perf_counter()
+    written = sum(len(chunk) for chunk in store.iter_export(format))
+    return ROWS / (time.perf_counter() - start), written
+
+
+def write_latencies(store, count=500):
+    """Milliseconds per record_analysis call"""
+    latencies = []
+    for _ in range(count):
+        result = {"image_id": str(uuid.uuid4()), "skin_type": "Dry", "detected_issues": [], "confidence": 0.9}
+        start = time.perf_counter()
+        store.record_analysis(result)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.001)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, "results.db"))
+        fill_store(store)
+
+        print_header(f"Export throughput, {ROWS} rows")
+        for format in ("ndjson", "csv"):
+            rate, written = export(store, format)
+            print(f"{format:>7}: {rate:10,.0f} rows/s  ({written / 1e6:.1f} MB)")
+
+        print_header("record_analysis latency (ms)")
+        p50, p99 = write_latencies(store)
+        print(f"   idle: p50 {p50:.3f}  p99 {p99:.3f}")
+
+        exporting = threading.Event()
+
+        def background_export():
+            exporting.set()
+            for _ in store.iter_export("ndjson"):
+                pass
+            exporting.clear()
+
+        thread = threading.Thread(target=background_export)
+        thread.start()
+        exporting.wait()
+        p50, p99 = write_latencies(store)
+        print(f" export: p50 {p50:.3f}  p99 {p99:.3f}")
+        thread.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
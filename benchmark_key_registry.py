@@ -0,0 +1,66 @@
+"""
+Benchmark: API key lookup cost vs registry size
+Auth cost should stay flat from a handful of keys to a million.
+
+Environment:
+    BENCH_KEY_COUNTS  comma separated registry sizes (default 10,10000,200000)
+    BENCH_LOOKUPS     lookups per measurement (default 100000)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.utils.key_registry import KeyRegistry, hash_key
+
+KEY_COUNTS = [int(n) for n in os.getenv("BENCH_KEY_COUNTS", "10,10000,200000").split(",")]
+LOOKUPS = int(os.getenv("BENCH_LOOKUPS", "100000"))
+
+
+def print_header(title):
+    """Print section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+
+def build_registry(count, directory):
+    """Write a JSON registry with `count` keys"""
+    path = os.path.join(directory, f"keys-{count}.json")
+    keys = [f"bench-key-{i:08d}" for i in range(count)]
+    with open(path, "w") as f:
+        json.dump({"keys": [{"key_hash": hash_key(key), "tenant": f"t{i % 100}"} for i, key in enumerate(keys)]}, f)
+    return path, keys
+
+
+def time_lookups(registry, keys):
+    """Microseconds per lookup, cycling through the sample keys"""
+    sample = [keys[(i * 7919) % len(keys)] for i in range(min(LOOKUPS, 1000))]
+    start = time.perf_counter()
+    for i in range(LOOKUPS):
+        registry.lookup(sample[i % len(sample)])
+    return (time.perf_counter() - start) / LOOKUPS * 1e6
+
+
+def main():
+    print_header(f"Key lookup cost, {LOOKUPS} lookups per run")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in KEY_COUNTS:
+            path, keys = build_registry(count, directory)
+
+            start = time.perf_counter()
+            uncached = KeyRegistry(path, cache_size=0)
+            load_ms = (time.perf_counter() - start) * 1000
+            cached = KeyRegistry(path, cache_size=10000)
+
+            print(f"{count:>9} keys: load {load_ms:8.1f} ms | "
+                  f"lookup {time_lookups(uncached, keys):5.2f} us (hash) | "
+                  f"{time_lookups(cached, keys):5.2f} us (cached) | "
+                  f"miss {time_lookups(uncached, ['unknown-key']):5.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Benchmark: shared-memory cache vs a per-process dict
+Measures put/get throughput for analysis records and the memory each
+worker would spend holding the same entries in its own dict.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from app.utils.analysis import MockAnalyzer
+from app.utils.shared_cache import (
+    KIND_ANALYSIS,
+    SharedCache,
+    SLOT_SIZE,
+    decode_analysis_record,
+    encode_analysis_record,
+)
+
+ENTRIES = int(os.getenv("BENCH_ENTRIES", "20000"))
+LOOKUPS = int(os.getenv("BENCH_LOOKUPS", "200000"))
+WORKERS = int(os.getenv("BENCH_WORKERS", "4"))
+
+
+def print_header(title):
+    """Print section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+
+def make_results():
+    """Generate mock analysis results"""
+    results = []
+    for _ in range(ENTRIES):
+        image_id = str(uuid.uuid4())
+        results.append({
+            "image_id": image_id,
+            "skin_type": random.choice(MockAnalyzer.SKIN_TYPES),
+            "detected_issues": random.sample(MockAnalyzer.POSSIBLE_ISSUES, random.randint(0, 2)),
+            "confidence": round(random.uniform(0.65, 0.99), 2),
+        })
+    return results
+
+
+def bench_dict(results, keys):
+    """Per-process dict holding full result dicts"""
+    tracemalloc.start()
+    cache = {}
+    start = time.perf_counter()
+    for result in results:
+        cache[result["image_id"]] = dict(result)
+    put_seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    get_seconds = time.perf_counter() - start
+    return put_seconds, get_seconds, memory
+
+
+def bench_shared(results, keys, path):
+    """Shared mmap table holding packed records"""
+    cache = SharedCache(path, capacity=max(ENTRIES * 2, 1024))
+    start = time.perf_counter()
+    for result in results:
+        cache.put(KIND_ANALYSIS, result["image_id"], encode_analysis_record(result))
+    put_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        value = cache.get(KIND_ANALYSIS, key)
+        if value is not None:
+            decode_analysis_record(key, value)
+    get_seconds = time.perf_counter() - start
+    memory = cache.capacity * SLOT_SIZE
+    stats = cache.stats()
+    cache.close()
+    return put_seconds, get_seconds, memory, stats
+
+
+def main():
+    results = make_results()
+    keys = [random.choice(results)["image_id"] for _ in range(LOOKUPS)]
+
+    print_header(f"{ENTRIES} entries, {LOOKUPS} lookups, {WORKERS} workers")
+
+    dict_put, dict_get, dict_memory = bench_dict(results, keys)
+    print("Per-process dict")
+    print(f"   put: {ENTRIES / dict_put:,.0f} ops/s")
+    print(f"   get: {LOOKUPS / dict_get:,.0f} ops/s")
+    print(f"   memory: {dict_memory / 1024 / 1024:.1f} MB per worker, "
+          f"{dict_memory * WORKERS / 1024 / 1024:.1f} MB for {WORKERS} workers")
+
+    path = os.path.join(tempfile.mkdtemp(), "bench-cache")
+    shared_put, shared_get, shared_memory, stats = bench_shared(results, keys, path)
+    os.remove(path)
+    print("Shared mmap cache")
+    print(f"   put: {ENTRIES / shared_put:,.0f} ops/s")
+    print(f"   get (incl. decode): {LOOKUPS / shared_get:,.0f} ops/s")
+    print(f"   memory: {shared_memory / 1024 / 1024:.1f} MB total, shared by all workers")
+    print(f"   hit rate: {stats['hits'] / max(stats['hits'] + stats['misses'], 1):.1%}, "
+          f"evictions: {stats['evictions']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Cold-start regression benchmark
+Starts fresh interpreters that import the app and run its startup, and
+fails if the median exceeds the budget.
+
+Usage:
+    python benchmark_startup.py [budget_ms]
+Environment:
+    STARTUP_BUDGET_MS  budget in milliseconds (default 1500)
+    STARTUP_RUNS       number of cold starts to time (default 5)
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BUDGET_MS = float(sys.argv[1] if len(sys.argv) > 1 else os.getenv("STARTUP_BUDGET_MS", "1500"))
+RUNS = int(os.getenv("STARTUP_RUNS", "5"))
+
+# Times import + lifespan startup from interpreter start to "ready"
+PROBE = """
+import time
+start = time.perf_counter()
+import asyncio
+from app.main import app, lifespan
+
+async def run():
+    async with lifespan(app):
+        pass
+
+asyncio.run(run())
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def print_header(title):
+    """Print section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+
+def cold_start(lazy: bool) -> float:
+    """Time one cold start in a fresh interpreter"""
+    # Startup creates the result store and aggregates; keep them out of the repo
+    with tempfile.TemporaryDirectory() as upload_dir:
+        env = dict(
+            os.environ,
+            LAZY_STARTUP="true" if lazy else "false",
+            STARTUP_WARM_UP="false",
+            UPLOAD_DIR=upload_dir
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True
+        )
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print_header(f"Cold start: {RUNS} runs, budget {BUDGET_MS:.0f} ms")
+
+    results = {}
+    for lazy in (False, True):
+        timings = [cold_start(lazy) for _ in range(RUNS)]
+        results[lazy] = statistics.median(timings)
+        label = "lazy" if lazy else "eager"
+        print(f"{label:>6}: median {results[lazy]:.1f} ms "
+              f"(min {min(timings):.1f}, max {max(timings):.1f})")
+
+    if results[True] > BUDGET_MS:
+        print(f"❌ Lazy cold start {results[True]:.1f} ms exceeds budget of {BUDGET_MS:.0f} ms")
+        return 1
+    print(f"✅ Lazy cold start within budget ({results[True]:.1f} / {BUDGET_MS:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -161,6 +161,133 @@ def test_openapi_schema():
         print_result("OpenAPI Schema", False, str(e))
         return False
 
+def test_progress_stream():
+    """Test 9: Analysis progress stream (SSE)"""
+    print_section("TEST 9: Progress Stream - GET /api/events")
+    try:
+        unauthorized = requests.get(f"{API_URL}/api/events", params={"image_ids": "some-id"}, timeout=5)
+        auth_ok = unauthorized.status_code in [401, 422]
+        print_result("API Key Required", auth_ok, f"Status: {unauthorized.status_code}")
+        
+        # Subscribing after the analysis finished still delivers its result
+        image_id = upload_test_image()
+        analysis = requests.post(f"{API_URL}/api/analyze", headers=HEADERS, json={"image_id": image_id})
+        analysis.raise_for_status()
+        
+        with requests.get(
+            f"{API_URL}/api/events",
+            headers=HEADERS,
+            params={"image_ids": image_id},
+            stream=True,
+            timeout=5
+        ) as response:
+            is_stream = (
+                response.status_code == 200
+                and response.headers.get("content-type", "").startswith("text/event-stream")
+            )
+            print_result("Event Stream Opened", is_stream, f"Status: {response.status_code}")
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("data: "):
+                    event = json.loads(line[len("data: "):])
+                    break
+        got_result = (
+            event is not None
+            and event["stage"] == "done"
+            and event["result"]["skin_type"] == analysis.json()["skin_type"]
+        )
+        print_result("Late Subscriber Gets Result", got_result, f"Event: {event}")
+        return auth_ok and is_stream and got_result
+    except Exception as e:
+        print_result("Progress Stream", False, str(e))
+        return False
+
+def upload_test_image():
+    """Upload a small valid JPEG and return its image_id"""
+    from PIL import Image
+    import io
+    
+    img = Image.new('RGB', (64, 64), color='blue')
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='JPEG')
+    img_bytes.seek(0)
+    
+    files = {'file': ('test.jpg', img_bytes, 'image/jpeg')}
+    response = requests.post(f"{API_URL}/api/upload", headers=HEADERS, files=files)
+    response.raise_for_status()
+    return response.json()["image_id"]
+
+def test_export():
+    """Test 10: Analyzed images appear in the export, which resumes from a cursor"""
+    print_section("TEST 10: Export - GET /api/export")
+    try:
+        image_id = upload_test_image()
+        analysis = requests.post(f"{API_URL}/api/analyze", headers=HEADERS, json={"image_id": image_id})
+        analysis.raise_for_status()
+        
+        export = requests.get(f"{API_URL}/api/export", headers=HEADERS, params={"format": "ndjson"})
+        rows = [json.loads(line) for line in export.text.splitlines() if line]
+        row = next((row for row in rows if row["image_id"] == image_id), None)
+        export_ok = (
+            export.status_code == 200
+            and row is not None
+            and row["skin_type"] == analysis.json()["skin_type"]
+        )
+        print_result("Export Contains Result", export_ok, f"Rows: {len(rows)}")
+        
+        # Resuming just before the new row returns it and nothing earlier
+        resume_ok = False
+        if row is not None:
+            resumed = requests.get(f"{API_URL}/api/export", headers=HEADERS, params={"cursor": row["cursor"] - 1})
+            resumed_rows = [json.loads(line) for line in resumed.text.splitlines() if line]
+            resume_ok = (
+                resumed.status_code == 200
+                and len(resumed_rows) > 0
+                and resumed_rows[0]["image_id"] == image_id
+                and all(resumed_row["cursor"] >= row["cursor"] for resumed_row in resumed_rows)
+            )
+            print_result("Export Resumes After Cursor", resume_ok, f"Rows: {len(resumed_rows)}")
+        
+        csv_export = requests.get(f"{API_URL}/api/export", headers=HEADERS, params={"format": "csv"})
+        csv_ok = csv_export.status_code == 200 and csv_export.text.startswith("cursor,image_id,")
+        print_result("CSV Export", csv_ok, f"Status: {csv_export.status_code}")
+        return export_ok and resume_ok and csv_ok
+    except Exception as e:
+        print_result("Export", False, str(e))
+        return False
+
+def test_stats():
+    """Test 11: Aggregate statistics count new analyses"""
+    print_section("TEST 11: Stats - GET /api/stats")
+    try:
+        before = requests.get(f"{API_URL}/api/stats", headers=HEADERS).json()["total"]["count"]
+        
+        image_id = upload_test_image()
+        analysis = requests.post(f"{API_URL}/api/analyze", headers=HEADERS, json={"image_id": image_id})
+        analysis.raise_for_status()
+        
+        stats = requests.get(f"{API_URL}/api/stats", headers=HEADERS, params={"bucket": "hour", "limit": 1})
+        count = stats.json()["total"]["count"]
+        is_success = stats.status_code == 200 and count == before + 1 and len(stats.json()["buckets"]) == 1
+        print_result("Stats Updated", is_success, f"Count: {before} -> {count}")
+        return is_success
+    except Exception as e:
+        print_result("Stats", False, str(e))
+        return False
+
+def test_admin_requires_key():
+    """Test 12: Admin endpoints reject requests without the admin key"""
+    print_section("TEST 12: Admin Endpoints Without Admin Key (Expected: 401 or 404)")
+    try:
+        paths = ["/api/admin/profile", "/api/admin/memory", "/api/admin/lanes", "/api/admin/caches", "/api/admin/transcode"]
+        statuses = {path: requests.get(f"{API_URL}{path}", headers=HEADERS).status_code for path in paths}
+        is_success = all(code in [401, 404] for code in statuses.values())
+        print_result("Admin Key Required", is_success, f"Statuses: {statuses}")
+        return is_success
+    except Exception as e:
+        print_result("Admin Key Required", False, str(e))
+        return False
+
 def run_all_tests():
     """Run all tests"""
     print("\n")
@@ -181,6 +308,10 @@ def run_all_tests():
     results.append(("Analyze Auth", test_analyze_without_api_key()))
     results.append(("Swagger Docs", test_swagger_docs()))
     results.append(("OpenAPI Schema", test_openapi_schema()))
+    results.append(("Progress Stream", test_progress_stream()))
+    results.append(("Export", test_export()))
+    results.append(("Stats", test_stats()))
+    results.append(("Admin Auth", test_admin_requires_key()))
     
     # Summary
     print_section("TEST SUMMARY")
@@ -0,0 +1,182 @@
+"""
+Behavior checks for execution lanes and request deadlines
+Runs lanes directly and the app through an in-process client; no server required
+"""
+
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import threading
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.config import settings
+from app.main import app
+from app.utils.lanes import ExecutionLane
+
+API_KEY = "test-api-key-12345"
+
+
+def print_section(title):
+    """Print test section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+def print_result(test_name, status, details=""):
+    """Print test result"""
+    symbol = "✅" if status else "❌"
+    print(f"{symbol} {test_name}")
+    if details:
+        print(f"   Details: {details}")
+
+async def _submit(lane, func):
+    """Run func on the lane; returns the HTTP status of a rejection, else None"""
+    try:
+        await lane.run(func)
+        return None
+    except HTTPException as e:
+        return e.status_code
+
+def test_rejects_at_capacity():
+    """Test 1: a full lane rejects new work with 503"""
+    print_section("TEST 1: 503 At Capacity")
+    lane = ExecutionLane("test-capacity", workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(_submit(lane, release.wait))
+        queued = asyncio.create_task(_submit(lane, release.wait))
+        await asyncio.sleep(0.05)
+        rejected = await _submit(lane, release.wait)
+        release.set()
+        return rejected, await running, await queued
+
+    try:
+        rejected, running, queued = asyncio.run(scenario())
+    finally:
+        release.set()
+        lane.shutdown()
+    metrics = lane.metrics()
+    checks = [rejected == 503, running is None, queued is None, metrics["rejected"] == 1, metrics["completed"] == 2]
+    print_result("Rejected with 503", all(checks), f"checks: {checks}")
+    return all(checks)
+
+def test_queued_job_dropped():
+    """Test 2: a cancelled job that has not started never runs and frees its slot"""
+    print_section("TEST 2: Queued Job Dropped On Cancel")
+    lane = ExecutionLane("test-queued", workers=1, max_queue=1)
+    release = threading.Event()
+    ran = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(_submit(lane, release.wait))
+        queued = asyncio.create_task(_submit(lane, ran.set))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        # The queue slot is free again while the first job still runs
+        admitted = asyncio.create_task(_submit(lane, lambda: None))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await running, await admitted
+
+    try:
+        running, admitted = asyncio.run(scenario())
+        lane._executor.shutdown(wait=True)
+    finally:
+        release.set()
+    metrics = lane.metrics()
+    checks = [
+        not ran.is_set(),
+        running is None,
+        admitted is None,
+        metrics["cancelled_queued"] == 1,
+        metrics["queued"] == 0 and metrics["active"] == 0,
+    ]
+    print_result("Dropped without running", all(checks), f"checks: {checks}")
+    return all(checks)
+
+def test_running_job_holds_slot():
+    """Test 3: a cancelled job that is running keeps its slot until it finishes"""
+    print_section("TEST 3: Running Job Holds Its Slot")
+    lane = ExecutionLane("test-running", workers=1, max_queue=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait()
+
+    async def scenario():
+        running = asyncio.create_task(_submit(lane, blocking))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        while_running = await _submit(lane, lambda: None)
+        release.set()
+        # Wait for the abandoned job to finish and release its slot
+        while lane.metrics()["active"]:
+            await asyncio.sleep(0.01)
+        after_finish = await _submit(lane, lambda: None)
+        return while_running, after_finish
+
+    try:
+        while_running, after_finish = asyncio.run(scenario())
+    finally:
+        release.set()
+        lane.shutdown()
+    metrics = lane.metrics()
+    checks = [while_running == 503, after_finish is None, metrics["abandoned_running"] == 1]
+    print_result("Slot held until finished", all(checks), f"checks: {checks}")
+    return all(checks)
+
+def test_zero_deadline(tmp_path):
+    """Test 4: X-Request-Timeout-Ms: 0 is answered with 504 and nothing is stored for it"""
+    print_section("TEST 4: 504 For X-Request-Timeout-Ms: 0")
+    img = Image.new('RGB', (32, 32), color='red')
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='JPEG')
+
+    upload_dir = str(tmp_path)
+    previous = settings.UPLOAD_DIR
+    settings.UPLOAD_DIR = upload_dir
+    try:
+        with TestClient(app) as client:
+            files = {"file": ("test.jpg", img_bytes.getvalue(), "image/jpeg")}
+            image_id = client.post("/api/upload", headers={"X-API-Key": API_KEY}, files=files).json()["image_id"]
+
+            headers = {"X-API-Key": API_KEY, "X-Request-Timeout-Ms": "0"}
+            upload = client.post("/api/upload", headers=headers, files=files)
+            analyze = client.post("/api/analyze", headers=headers, json={"image_id": image_id})
+        stored = [name for name in os.listdir(upload_dir) if name.endswith((".jpg", ".png", ".webp"))]
+    finally:
+        settings.UPLOAD_DIR = previous
+    # Only the upload made without a deadline is stored
+    checks = [upload.status_code == 504, analyze.status_code == 504, len(stored) == 1]
+    print_result("Deadline exceeded", all(checks), f"checks: {checks}")
+    return all(checks)
+
+def run_all_tests():
+    """Run all tests"""
+    results = []
+    results.append(("503 At Capacity", test_rejects_at_capacity()))
+    results.append(("Queued Job Dropped", test_queued_job_dropped()))
+    results.append(("Running Job Holds Slot", test_running_job_holds_slot()))
+    with tempfile.TemporaryDirectory() as tmp_path:
+        results.append(("Zero Deadline", test_zero_deadline(tmp_path)))
+
+    print_section("TEST SUMMARY")
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        symbol = "✅" if result else "❌"
+        print(f"{symbol} {test_name}")
+    print(f"\nResults: {passed}/{len(results)} tests passed")
+    return passed == len(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_all_tests() else 1)
@@ -0,0 +1,137 @@
+"""
+Behavior checks for per-route peak memory tracking
+Drives RouteMemoryMiddleware with a stand-in app; no server required
+"""
+
+import asyncio
+import sys
+import tracemalloc
+
+from app.utils.memory import RouteMemoryMiddleware, route_peaks
+
+
+def print_section(title):
+    """Print test section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+def print_result(test_name, status, details=""):
+    """Print test result"""
+    symbol = "✅" if status else "❌"
+    print(f"{symbol} {test_name}")
+    if details:
+        print(f"   Details: {details}")
+
+class StandInApp:
+    """ASGI app that allocates on /api/upload and holds /api/events open until released"""
+
+    def __init__(self):
+        self.stream_open = asyncio.Event()
+        self.release_stream = asyncio.Event()
+        self.release_upload = asyncio.Event()
+        self.release_upload.set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["path"] == "/api/events":
+            self.stream_open.set()
+            await self.release_stream.wait()
+            return
+        buffer = bytearray(1024 * 1024)
+        await self.release_upload.wait()
+        del buffer
+
+def request(middleware, path):
+    """Send one http request through the middleware"""
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    return middleware({"type": "http", "path": path}, receive, send)
+
+def test_alone():
+    """Test 1: a request on its own records its peak"""
+    print_section("TEST 1: Peak Recorded For A Lone Request")
+
+    async def scenario():
+        await request(RouteMemoryMiddleware(StandInApp()), "/api/upload")
+
+    asyncio.run(scenario())
+    entry = route_peaks.snapshot().get("/api/upload", {})
+    status = entry.get("requests") == 1 and entry.get("max_peak_bytes", 0) >= 1024 * 1024
+    print_result("Peak recorded", status, str(entry))
+    return status
+
+def test_with_open_stream():
+    """Test 2: an open progress stream does not stop other routes being measured"""
+    print_section("TEST 2: Peaks Recorded While A Stream Is Open")
+
+    async def scenario():
+        app = StandInApp()
+        middleware = RouteMemoryMiddleware(app)
+        stream = asyncio.create_task(request(middleware, "/api/events"))
+        await app.stream_open.wait()
+        for _ in range(3):
+            await request(middleware, "/api/upload")
+        app.release_stream.set()
+        await stream
+
+    asyncio.run(scenario())
+    snapshot = route_peaks.snapshot()
+    entry = snapshot.get("/api/upload", {})
+    checks = [
+        entry.get("requests") == 3,
+        entry.get("skipped_overlapping") == 0,
+        "/api/events" not in snapshot,
+    ]
+    print_result("Stream ignored", all(checks), str(snapshot))
+    return all(checks)
+
+def test_overlapping():
+    """Test 3: overlapping requests are skipped, not recorded"""
+    print_section("TEST 3: Overlapping Requests Skipped")
+
+    async def scenario():
+        app = StandInApp()
+        app.release_upload.clear()
+        middleware = RouteMemoryMiddleware(app)
+        first = asyncio.create_task(request(middleware, "/api/upload"))
+        second = asyncio.create_task(request(middleware, "/api/upload"))
+        await asyncio.sleep(0.01)
+        app.release_upload.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    entry = route_peaks.snapshot().get("/api/upload", {})
+    status = entry.get("requests") == 0 and entry.get("skipped_overlapping") == 2
+    print_result("Both skipped", status, str(entry))
+    return status
+
+def run_all_tests():
+    """Run all tests"""
+    results = []
+    tracemalloc.start()
+    try:
+        for name, test in (
+            ("Lone Request", test_alone),
+            ("Open Stream", test_with_open_stream),
+            ("Overlapping", test_overlapping),
+        ):
+            route_peaks.clear()
+            results.append((name, test()))
+    finally:
+        tracemalloc.stop()
+        route_peaks.clear()
+
+    print_section("TEST SUMMARY")
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        symbol = "✅" if result else "❌"
+        print(f"{symbol} {test_name}")
+    print(f"\nResults: {passed}/{len(results)} tests passed")
+    return passed == len(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_all_tests() else 1)
@@ -0,0 +1,110 @@
+"""
+Behavior checks for the per-key quota table shared by workers
+Runs against temporary quota files; no server required
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from app.utils.quota import SharedQuota
+
+
+def print_section(title):
+    """Print test section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+def print_result(test_name, status, details=""):
+    """Print test result"""
+    symbol = "✅" if status else "❌"
+    print(f"{symbol} {test_name}")
+    if details:
+        print(f"   Details: {details}")
+
+def _worker(path, attempts, allowed):
+    """Stand-in for one uvicorn worker: count requests for one key"""
+    quota = SharedQuota(path, capacity=64)
+    try:
+        admitted = sum(1 for _ in range(attempts) if quota.consume("key-1", 60) is None)
+    finally:
+        quota.close()
+    with allowed.get_lock():
+        allowed.value += admitted
+
+def test_shared_across_processes(tmp_path):
+    """Test 1: workers together admit the quota once, not once each"""
+    print_section("TEST 1: Quota Shared Across Processes")
+    path = os.path.join(tmp_path, "shared")
+    allowed = multiprocessing.Value("i", 0)
+    workers = [multiprocessing.Process(target=_worker, args=(path, 50, allowed)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # Unless the minute rolled over mid-test, exactly the quota is admitted
+    status = 60 <= allowed.value <= 120
+    print_result("60 of 200 requests admitted", status, f"Admitted: {allowed.value}")
+    return status
+
+def test_window_reset(tmp_path):
+    """Test 2: a new minute resets the count, and Retry-After points to it"""
+    print_section("TEST 2: Window Reset and Retry-After")
+    quota = SharedQuota(os.path.join(tmp_path, "reset"), capacity=64)
+    try:
+        minute = 1_800_000_000 // 60 * 60
+        admitted = [quota.consume("key-1", 2, now=minute + 10) for _ in range(2)]
+        rejected = quota.consume("key-1", 2, now=minute + 45)
+        other_key = quota.consume("key-2", 2, now=minute + 45)
+        next_minute = quota.consume("key-1", 2, now=minute + 61)
+        checks = [
+            admitted == [None, None],
+            rejected == 16,
+            other_key is None,
+            next_minute is None,
+            quota.rejected == 1,
+        ]
+        print_result("Window reset", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        quota.close()
+
+def test_stale_slots_reused(tmp_path):
+    """Test 3: slots of keys idle this minute are reused instead of overflowing"""
+    print_section("TEST 3: Stale Slots Reused")
+    quota = SharedQuota(os.path.join(tmp_path, "stale"), capacity=4)
+    try:
+        minute = 1_800_000_000 // 60 * 60
+        first = [quota.consume(f"key-{i}", 5, now=minute) for i in range(4)]
+        full = quota.consume("key-4", 5, now=minute)
+        later = [quota.consume(f"key-{i}", 5, now=minute + 60) for i in range(4, 8)]
+        checks = [
+            first == [None] * 4,
+            full is None and quota.overflows == 1,
+            later == [None] * 4 and quota.overflows == 1,
+        ]
+        print_result("Stale slots reused", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        quota.close()
+
+def run_all_tests():
+    """Run all tests"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_path:
+        results.append(("Shared Across Processes", test_shared_across_processes(tmp_path)))
+        results.append(("Window Reset", test_window_reset(tmp_path)))
+        results.append(("Stale Slots Reused", test_stale_slots_reused(tmp_path)))
+
+    print_section("TEST SUMMARY")
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        symbol = "✅" if result else "❌"
+        print(f"{symbol} {test_name}")
+    print(f"\nResults: {passed}/{len(results)} tests passed")
+    return passed == len(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_all_tests() else 1)
@@ -0,0 +1,216 @@
+"""
+Behavior checks for the cross-worker shared-memory cache
+Runs against temporary cache files; no server required
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from app.config import settings
+from app.utils import shared_cache
+from app.utils.shared_cache import (
+    KIND_ANALYSIS, KIND_IMAGE, MAX_VALUE_SIZE, PROBE_LIMIT, SharedCache,
+    decode_analysis_record, decode_image_record, encode_analysis_record, encode_image_record,
+)
+from app.utils.validators import find_image_path
+
+
+def print_section(title):
+    """Print test section header"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+def print_result(test_name, status, details=""):
+    """Print test result"""
+    symbol = "✅" if status else "❌"
+    print(f"{symbol} {test_name}")
+    if details:
+        print(f"   Details: {details}")
+
+def test_round_trip(tmp_path):
+    """Test 1: put/get round-trip for both record kinds"""
+    print_section("TEST 1: Put / Get Round-Trip")
+    cache = SharedCache(os.path.join(tmp_path, "round-trip"), capacity=64)
+    try:
+        result = {"image_id": "img-1", "skin_type": "Oily", "detected_issues": ["Acne", "Redness"], "confidence": 0.87}
+        cache.put(KIND_IMAGE, "img-1", encode_image_record("webp", 12345))
+        cache.put(KIND_ANALYSIS, "img-1", encode_analysis_record(result))
+
+        image = decode_image_record(cache.get(KIND_IMAGE, "img-1"))
+        analysis = decode_analysis_record("img-1", cache.get(KIND_ANALYSIS, "img-1"))
+        checks = [
+            image == {"ext": "webp", "size": 12345},
+            analysis == result,
+            cache.get(KIND_IMAGE, "img-2") is None,
+            cache.get(KIND_ANALYSIS, "unknown") is None,
+            cache.put(KIND_IMAGE, "big", b"x" * (MAX_VALUE_SIZE + 1)) is False,
+        ]
+
+        # Replacing a key updates it in place
+        cache.put(KIND_IMAGE, "img-1", encode_image_record("jpg", 999))
+        checks.append(decode_image_record(cache.get(KIND_IMAGE, "img-1")) == {"ext": "jpg", "size": 999})
+
+        print_result("Round-trip", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        cache.close()
+
+def test_eviction(tmp_path):
+    """Test 2: oldest record is evicted when the probe window is full"""
+    print_section("TEST 2: Eviction When Probe Window Is Full")
+    # With capacity == PROBE_LIMIT every key probes every slot
+    cache = SharedCache(os.path.join(tmp_path, "eviction"), capacity=PROBE_LIMIT)
+    try:
+        for i in range(PROBE_LIMIT):
+            cache.put(KIND_IMAGE, f"key-{i}", encode_image_record("png", i))
+            time.sleep(0.002)
+        full = all(cache.get(KIND_IMAGE, f"key-{i}") is not None for i in range(PROBE_LIMIT))
+
+        cache.put(KIND_IMAGE, "key-new", encode_image_record("png", 100))
+        checks = [
+            full,
+            cache.evictions == 1,
+            cache.get(KIND_IMAGE, "key-0") is None,
+            decode_image_record(cache.get(KIND_IMAGE, "key-new"))["size"] == 100,
+            all(cache.get(KIND_IMAGE, f"key-{i}") is not None for i in range(1, PROBE_LIMIT)),
+        ]
+        print_result("Oldest evicted", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        cache.close()
+
+def test_reopen_with_different_capacity(tmp_path):
+    """Test 3: an existing file keeps its capacity and contents"""
+    print_section("TEST 3: Reopen With Different Capacity")
+    path = os.path.join(tmp_path, "reopen")
+    first = SharedCache(path, capacity=32)
+    first.put(KIND_IMAGE, "persisted", encode_image_record("jpg", 7))
+    first.close()
+
+    second = SharedCache(path, capacity=1024)
+    try:
+        checks = [
+            second.capacity == 32,
+            os.path.getsize(path) == shared_cache.HEADER_SIZE + 32 * shared_cache.SLOT_SIZE,
+            decode_image_record(second.get(KIND_IMAGE, "persisted")) == {"ext": "jpg", "size": 7},
+        ]
+        print_result("Capacity and data kept", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        second.close()
+
+def test_incompatible_file(tmp_path):
+    """Test 4: a file with a different slot layout is rejected"""
+    print_section("TEST 4: Incompatible File Rejected")
+    path = os.path.join(tmp_path, "incompatible")
+    with open(path, "wb") as f:
+        f.write(shared_cache.HEADER.pack(shared_cache.MAGIC, shared_cache.VERSION + 1, 0, shared_cache.SLOT_SIZE, 8))
+        f.write(b"\0" * (shared_cache.HEADER_SIZE - shared_cache.HEADER.size + 8 * shared_cache.SLOT_SIZE))
+    try:
+        SharedCache(path, capacity=8).close()
+        print_result("ValueError raised", False)
+        return False
+    except ValueError as e:
+        print_result("ValueError raised", True, str(e))
+        return True
+
+def test_json_fallback(tmp_path):
+    """Test 5: results outside the analyzer's tables use the JSON format"""
+    print_section("TEST 5: JSON Fallback Records")
+    cache = SharedCache(os.path.join(tmp_path, "json"), capacity=64)
+    try:
+        result = {"image_id": "img-x", "skin_type": "Mature", "detected_issues": ["Sun Damage"], "confidence": 0.731}
+        value = encode_analysis_record(result)
+        cache.put(KIND_ANALYSIS, "img-x", value)
+        checks = [
+            value[0] == shared_cache.FORMAT_JSON,
+            decode_analysis_record("img-x", cache.get(KIND_ANALYSIS, "img-x")) == result,
+            encode_analysis_record({**result, "skin_type": "Oily", "detected_issues": []})[0] == shared_cache.FORMAT_PACKED,
+        ]
+        print_result("JSON round-trip", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        cache.close()
+
+def test_delete(tmp_path):
+    """Test 6: deleted records leave keys further along the window reachable"""
+    print_section("TEST 6: Delete With Tombstones")
+    # With capacity == PROBE_LIMIT every key shares one probe window
+    cache = SharedCache(os.path.join(tmp_path, "delete"), capacity=PROBE_LIMIT)
+    try:
+        for i in range(4):
+            cache.put(KIND_IMAGE, f"key-{i}", encode_image_record("png", i))
+        checks = [
+            cache.delete(KIND_IMAGE, "key-0") is True,
+            cache.delete(KIND_IMAGE, "key-0") is False,
+            cache.get(KIND_IMAGE, "key-0") is None,
+            all(decode_image_record(cache.get(KIND_IMAGE, f"key-{i}"))["size"] == i for i in range(1, 4)),
+        ]
+
+        # Filling the window reuses the tombstone before evicting anything
+        for i in range(4, PROBE_LIMIT + 1):
+            cache.put(KIND_IMAGE, f"key-{i}", encode_image_record("png", i))
+        checks.append(cache.evictions == 0)
+        checks.append(all(cache.get(KIND_IMAGE, f"key-{i}") is not None for i in range(1, PROBE_LIMIT + 1)))
+
+        print_result("Delete and reuse", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        cache.close()
+
+def test_stale_image_record(tmp_path):
+    """Test 7: a cached image whose file is gone is reported missing and dropped"""
+    print_section("TEST 7: Cached Image Removed From Disk")
+    cache = SharedCache(os.path.join(tmp_path, "stale"), capacity=64)
+    upload_dir = os.path.join(tmp_path, "uploads")
+    os.makedirs(upload_dir)
+    previous = (shared_cache._cache, settings.SHARED_CACHE_ENABLED, settings.UPLOAD_DIR)
+    shared_cache._cache, settings.SHARED_CACHE_ENABLED, settings.UPLOAD_DIR = cache, True, upload_dir
+    try:
+        image_path = os.path.join(upload_dir, "img-1.webp")
+        with open(image_path, "wb") as f:
+            f.write(b"data")
+        found = find_image_path("img-1")
+        cache.put(KIND_ANALYSIS, "img-1", encode_analysis_record(
+            {"image_id": "img-1", "skin_type": "Oily", "detected_issues": [], "confidence": 0.9}
+        ))
+
+        os.remove(image_path)
+        checks = [
+            found == image_path,
+            cache.get(KIND_IMAGE, "img-1") is not None,
+            find_image_path("img-1") is None,
+            cache.get(KIND_IMAGE, "img-1") is None,
+            cache.get(KIND_ANALYSIS, "img-1") is None,
+        ]
+        print_result("Stale record dropped", all(checks), f"checks: {checks}")
+        return all(checks)
+    finally:
+        shared_cache._cache, settings.SHARED_CACHE_ENABLED, settings.UPLOAD_DIR = previous
+        cache.close()
+
+def run_all_tests():
+    """Run all tests"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_path:
+        results.append(("Round-Trip", test_round_trip(tmp_path)))
+        results.append(("Eviction", test_eviction(tmp_path)))
+        results.append(("Reopen Capacity", test_reopen_with_different_capacity(tmp_path)))
+        results.append(("Incompatible File", test_incompatible_file(tmp_path)))
+        results.append(("JSON Fallback", test_json_fallback(tmp_path)))
+        results.append(("Delete", test_delete(tmp_path)))
+        results.append(("Stale Image Record", test_stale_image_record(tmp_path)))
+
+    print_section("TEST SUMMARY")
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        symbol = "✅" if result else "❌"
+        print(f"{symbol} {test_name}")
+    print(f"\nResults: {passed}/{len(results)} tests passed")
+    return passed == len(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_all_tests() else 1)